@@ -1,16 +1,46 @@
-from datetime import datetime, timedelta
+import sys
+import threading
+import time
+from array import array
+from collections import Counter, OrderedDict
+from importlib import import_module
+from operator import itemgetter
+from types import MappingProxyType
+from typing import Protocol
+from datetime import date, datetime, timedelta
 from functools import wraps
 from os import environ
 
+import bisect
+import csv
+import hashlib
+import heapq
+import io
+import json
+import math
+import re
+
+import click
 import requests
 from dotenv import load_dotenv
 from email_validator import validate_email, EmailNotValidError
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, g, has_request_context, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import create_access_token, get_jwt_identity, jwt_required, JWTManager, verify_jwt_in_request, \
     get_jwt
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.exc import NoResultFound
+from flask_sqlalchemy.session import Session as FlaskSQLAlchemySession
+from sqlalchemy import case, event, func, insert, inspect, select, text, tuple_, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import NoResultFound, TimeoutError as PoolTimeoutError
+from sqlalchemy.sql.expression import TextClause, TextualSelect
+from sqlalchemy.pool import QueuePool
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # load environment variables from .env file
 load_dotenv(".env")
@@ -19,6 +49,55 @@ GMAIL_API_URL = environ.get('GMAIL_API_URL')
 BASIC_USER = "1"
 ADMIN_USER = "2"
 
+# Bit assigned to each relation type in employer_lineage.lineage_relation_mask; any other type uses OTHER_RELATION_BIT
+RELATION_TYPE_BITS = {"Rebranding": 1, "Spin-off": 2, "Merger": 4}
+OTHER_RELATION_BIT = 8
+ALL_RELATION_BITS = 15
+
+# Employer columns behind each field of the front end employer payload (see Employer.to_front_end)
+EMPLOYER_FRONT_END_FIELDS = {
+    "id": "employer_id",
+    "name": "employer_name",
+    "foundedDate": "employer_founded_date",
+    "dissolvedDate": "employer_dissolved_date",
+    "bankruptcyDate": "employer_bankruptcy_date",
+    "industrySectorCode": "employer_industry_sector_code",
+    "status": "employer_status",
+    "legalStatus": "employer_legal_status",
+}
+EMPLOYER_FRONT_END_DATE_FIELDS = {"foundedDate", "dissolvedDate", "bankruptcyDate"}
+EMPLOYER_FRONT_END_ADDRESS_FIELDS = {
+    "line1": "employer_addr_line_1",
+    "line2": "employer_addr_line_2",
+    "city": "employer_addr_city",
+    "state": "employer_addr_state",
+    "zipCode": "employer_addr_zip_code",
+}
+EMPLOYER_PAGE_SIZE = 100
+MAX_EMPLOYER_PAGE_SIZE = 1000
+
+# Number of rows fetched from the server-side cursor per chunk of a bulk export
+EXPORT_CHUNK_SIZE = 1000
+# Number of rows inserted per transaction by a bulk import, unless the request asks for another batch size
+IMPORT_BATCH_SIZE = 1000
+MAX_IMPORT_BATCH_SIZE = 10000
+
+# Fields create_employer requires, and the employer and relation columns accepted by the bulk import
+REQUIRED_EMPLOYER_FIELDS = ["employer_name", "employer_addr_line_1", "employer_addr_city", "employer_addr_state",
+                            "employer_addr_zip_code", "employer_founded_date", "employer_industry_sector_code",
+                            "employer_status", "employer_legal_status"]
+IMPORT_EMPLOYER_FIELDS = REQUIRED_EMPLOYER_FIELDS + ["employer_addr_line_2", "employer_dissolved_date",
+                                                     "employer_bankruptcy_date"]
+IMPORT_RELATION_FIELDS = ["parent_employer_id", "child_employer_id", "employer_relation_type",
+                          "employer_relation_start_date"]
+IMPORT_DATE_FIELDS = {"employer_founded_date", "employer_dissolved_date", "employer_bankruptcy_date",
+                      "employer_relation_start_date"}
+
+# Names of the counters in the data_versions table
+EMPLOYERS_VERSION = "employers"
+EMPLOYER_RELATIONS_VERSION = "employer_relations"
+NAICS_CODES_VERSION = "naics_codes"
+
 
 # Here is a custom decorator that verifies the JWT is present in the request,
 # as well as insuring that the JWT has a claim indicating that this user is
@@ -40,6 +119,60 @@ def admin_required():
     return wrapper
 
 
+# Declares how many SQL statements a route may run, e.g. @query_budget(5) between @application.route and the
+# authentication decorator. Depending on QUERY_BUDGET_MODE, requests going over it are logged or fail with
+# QueryBudgetExceeded, in both cases with the statements they repeated, which is how N+1 query patterns show up
+def query_budget(max_statements):
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            mode = application.config['QUERY_BUDGET_MODE']
+            request_metrics = g.get("request_metrics") if mode != 'off' else None
+            if request_metrics is None:
+                return fn(*args, **kwargs)
+
+            request_metrics.statements = statements = []
+            try:
+                response = fn(*args, **kwargs)
+            finally:
+                request_metrics.statements = None
+            if len(statements) > max_statements:
+                message = f"{request.method} {request.path} ran {len(statements)} SQL statements, over its budget " \
+                          f"of {max_statements}"
+                for count, shape in repeated_statement_shapes(statements):
+                    message += f"\n  {count} x {shape}"
+                if mode == 'raise':
+                    raise QueryBudgetExceeded(message)
+                application.logger.warning(message)
+            return response
+
+        return decorator
+
+    return wrapper
+
+
+def statement_shape(statement):
+    """
+    Reduce a SQL statement to its shape, so statements only differing by their parameters compare equal.
+
+    :param statement: The SQL statement as sent to the database.
+
+    :return: The statement on one line, with its select list, literals and lists of placeholders collapsed.
+    """
+    shape = re.sub(r"\s+", " ", statement).strip()
+    shape = re.sub(r"^SELECT .*? FROM ", "SELECT ... FROM ", shape)
+    shape = re.sub(r"'(?:[^']|'')*'|\b\d+\b", "?", shape)
+    return re.sub(r"\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*,)*\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*\)", "(...)", shape)
+
+
+def repeated_statement_shapes(statements, limit=5):
+    """
+    :return: List of (count, shape) tuples of the statement shapes run more than once, most repeated first.
+    """
+    shapes = Counter(statement_shape(statement) for statement in statements)
+    return [(count, shape) for shape, count in shapes.most_common(limit) if count > 1]
+
+
 def init_application():
     app = Flask(__name__)
     # TODO: ensure that env variables are defined
@@ -50,18 +183,281 @@ def init_application():
     db_port = environ.get('DB_PORT')
     app.config[
         'SQLALCHEMY_DATABASE_URI'] = f'mysql+pymysql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}'
+    # A full SQLAlchemy URL (e.g. for a benchmark database) takes precedence over the DB_* variables
+    if environ.get('DATABASE_URL'):
+        app.config['SQLALCHEMY_DATABASE_URI'] = environ['DATABASE_URL']
+    # Connection pool of each worker process: DB_POOL_SIZE connections stay open, up to DB_MAX_OVERFLOW more are opened
+    # under load, and a request waits at most DB_POOL_TIMEOUT seconds for a free one. Connections are replaced after
+    # DB_POOL_RECYCLE seconds, which must stay below MySQL's wait_timeout, and DB_POOL_PRE_PING checks every connection
+    # before handing it out. SQLite databases keep the pool Flask-SQLAlchemy picks for them
+    if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            'poolclass': TimedQueuePool,
+            'pool_size': int(environ.get('DB_POOL_SIZE', 10)),
+            'max_overflow': int(environ.get('DB_MAX_OVERFLOW', 10)),
+            'pool_timeout': float(environ.get('DB_POOL_TIMEOUT', 10)),
+            'pool_recycle': int(environ.get('DB_POOL_RECYCLE', 1800)),
+            'pool_pre_ping': environ.get('DB_POOL_PRE_PING', 'true') == 'true',
+        }
+    # Comma separated SQLAlchemy URLs of read replicas. Routes marked with @use_read_replica() run their queries on one
+    # of them, picked round-robin among the replicas that answered their last health check (at most
+    # READ_REPLICA_CHECK_SECONDS ago), while writes and everything after them in the same request stay on the primary
+    replica_urls = [url.strip() for url in environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    app.config['SQLALCHEMY_BINDS'] = {f'replica_{index}': url for index, url in enumerate(replica_urls)}
+    app.config['READ_REPLICA_BINDS'] = list(app.config['SQLALCHEMY_BINDS'])
+    app.config['READ_REPLICA_CHECK_SECONDS'] = float(environ.get('READ_REPLICA_CHECK_SECONDS', 5))
+    # Open the pool's connections when the application is imported, so the first requests of a worker do not wait for
+    # them. Leave it off when workers are forked after the import (e.g. gunicorn --preload) and call
+    # warm_up_connection_pool from the worker instead
+    app.config['DB_POOL_WARM_UP'] = environ.get('DB_POOL_WARM_UP', 'false') == 'true'
     secret_key = environ.get('SECRET_KEY')
     app.config['SECRET_KEY'] = secret_key
+    # "component" loads employer graphs by their precomputed component id, "index" walks them over the in-process
+    # relation index, "frontier" queries the database per level and "recursive_cte" asks the database for the whole
+    # lineage in one WITH RECURSIVE query
+    app.config['EMPLOYER_GRAPH_STRATEGY'] = environ.get('EMPLOYER_GRAPH_STRATEGY', 'component')
+    # "thread" sends queued emails from a background thread in each worker, "none" leaves it to `flask dispatch-emails`
+    app.config['EMAIL_DISPATCHER'] = environ.get('EMAIL_DISPATCHER', 'thread')
+    app.config['EMAIL_API_TIMEOUT'] = float(environ.get('EMAIL_API_TIMEOUT', 10))
+    app.config['EMAIL_BATCH_SIZE'] = int(environ.get('EMAIL_BATCH_SIZE', 20))
+    app.config['EMAIL_MAX_ATTEMPTS'] = int(environ.get('EMAIL_MAX_ATTEMPTS', 6))
+    app.config['EMAIL_RETRY_BASE_SECONDS'] = float(environ.get('EMAIL_RETRY_BASE_SECONDS', 30))
+    # How long a dispatcher may take to send a claimed batch before another dispatcher claims the emails again
+    app.config['EMAIL_LEASE_SECONDS'] = float(environ.get('EMAIL_LEASE_SECONDS', 300))
+    app.config['EMAIL_POLL_SECONDS'] = float(environ.get('EMAIL_POLL_SECONDS', 5))
+    # "memory" caches responses in each worker, "none" disables the cache, and any other value is the import path
+    # ("module:Class") of a shared CacheBackend
+    app.config['RESPONSE_CACHE_BACKEND'] = environ.get('RESPONSE_CACHE_BACKEND', 'memory')
+    app.config['RESPONSE_CACHE_TTL'] = float(environ.get('RESPONSE_CACHE_TTL', 60))
+    app.config['RESPONSE_CACHE_MAX_ENTRIES'] = int(environ.get('RESPONSE_CACHE_MAX_ENTRIES', 1024))
+    app.config['RESPONSE_CACHE_MAX_BYTES'] = int(environ.get('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    app.config['GRAPH_LAYOUT_CACHE_SIZE'] = int(environ.get('GRAPH_LAYOUT_CACHE_SIZE', 4096))
+    # "auto" serializes responses with orjson when it is installed, "default" always uses Flask's provider, and any
+    # other value is the import path ("module:Class") of a JSONProvider
+    app.config['JSON_PROVIDER'] = environ.get('JSON_PROVIDER', 'auto')
+    # "rows" builds employer list payloads straight from the selected column tuples, "orm" from Employer objects
+    app.config['EMPLOYER_SERIALIZATION'] = environ.get('EMPLOYER_SERIALIZATION', 'rows')
+    # Report the number of SQL statements each request ran in an X-Query-Count response header
+    app.config['QUERY_COUNT_HEADER'] = environ.get('QUERY_COUNT_HEADER', 'false') == 'true'
+    # Record request latencies, SQL statements and email API calls, and serve them from /metrics for Prometheus. When
+    # METRICS_TOKEN is set, scrapers must send it as a bearer token
+    app.config['METRICS_ENABLED'] = environ.get('METRICS_ENABLED', 'true') == 'true'
+    app.config['METRICS_TOKEN'] = environ.get('METRICS_TOKEN')
+    # "raise" fails requests running more SQL statements than the @query_budget of their route, "log" logs them, and
+    # "off" skips the check
+    app.config['QUERY_BUDGET_MODE'] = environ.get('QUERY_BUDGET_MODE', 'off')
+    app.json = build_json_provider(app)
     return app
 
 
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    JSON provider encoding responses with orjson, which writes the bytes of the response body directly. Types orjson
+    does not know fall back to the conversions of Flask's default provider.
+
+    The bodies decode to the same JSON as with the default provider but are not byte for byte identical: orjson writes
+    non-ASCII characters as raw UTF-8 ("Café"), where Flask's provider escapes them ("Caf\\u00e9").
+    """
+
+    def _options(self, indent=False):
+        # orjson would write dates in ISO 8601, Flask's default conversion writes them as HTTP dates
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._options(kwargs.get("indent"))).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self.default, option=self._options(indent))
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
+
+def build_json_provider(app):
+    """
+    Create the JSON provider selected by the JSON_PROVIDER setting.
+
+    :param app: The Flask application.
+
+    :return: The JSONProvider instance for app.json.
+    """
+    provider_name = app.config['JSON_PROVIDER']
+    if provider_name == 'auto':
+        return OrjsonProvider(app) if orjson is not None else DefaultJSONProvider(app)
+    if provider_name == 'orjson':
+        if orjson is None:
+            raise RuntimeError("JSON_PROVIDER is orjson but orjson is not installed")
+        return OrjsonProvider(app)
+    if provider_name == 'default':
+        return DefaultJSONProvider(app)
+    module_name, class_name = provider_name.split(':')
+    return getattr(import_module(module_name), class_name)(app)
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool recording how long every checkout waited for a connection, including the time to open a new one, and
+    how many checkouts gave up after pool_timeout.
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_timeouts.inc(())
+            raise
+        pool_wait_time.observe((), time.perf_counter() - started)
+        return connection
+
+
+class RoutingSession(FlaskSQLAlchemySession):
+    """
+    Session running the queries of @use_read_replica() routes on a read replica.
+
+    The replica is picked on the first query of the request and kept for the rest of it. The pin_to_primary event
+    listeners below move the session back to the primary for good once it writes, so a request reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = self.info.get("read_replica")
+        if bind is None and replica is not None:
+            if replica is True:
+                replica = self.info["read_replica"] = replica_router.choose()
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "before_flush")
+def pin_flushing_session_to_primary(session, flush_context, instances):
+    if session.info.get("read_replica") is not None:
+        session.info["read_replica"] = None
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def pin_writing_session_to_primary(orm_execute_state):
+    # Runs before the statement's bind is chosen. Anything but a SELECT writes, and so does raw SQL, as far as the
+    # session can tell, unless the route declared with use_read_replica(text_reads=True) that its raw SQL only reads
+    session = orm_execute_state.session
+    if session.info.get("read_replica") is None:
+        return
+    if isinstance(orm_execute_state.statement, (TextClause, TextualSelect)):
+        if session.info.get("read_replica_text_reads"):
+            return
+    elif orm_execute_state.is_select:
+        return
+    session.info["read_replica"] = None
+
+
 application = init_application()
 jwt = JWTManager(application)
 
-db = SQLAlchemy(application)
+db = SQLAlchemy(application, session_options={"class_": RoutingSession})
 bcrypt = Bcrypt(application)
 
 
+class ReplicaRouter:
+    """
+    Round-robin choice among the read replicas that are up.
+
+    A replica is pinged before it is used when its last check is older than READ_REPLICA_CHECK_SECONDS. Replicas that
+    fail the ping, or lose their connection in the middle of a query, are skipped until their next check.
+    """
+
+    def __init__(self, app):
+        self._app = app
+        self._lock = threading.Lock()
+        self._next = 0
+        self._checks = {}
+
+    def choose(self):
+        """
+        :return: The engine of the next replica that is up, or None if the primary has to serve the reads.
+        """
+        bind_keys = self._app.config['READ_REPLICA_BINDS']
+        if not bind_keys:
+            return None
+        with self._lock:
+            start = self._next
+            self._next = (start + 1) % len(bind_keys)
+        for offset in range(len(bind_keys)):
+            bind_key = bind_keys[(start + offset) % len(bind_keys)]
+            if self.is_up(bind_key):
+                return db.engines[bind_key]
+        return None
+
+    def is_up(self, bind_key):
+        checked_at, up = self._checks.get(bind_key, (None, False))
+        now = time.monotonic()
+        if checked_at is None or now - checked_at >= self._app.config['READ_REPLICA_CHECK_SECONDS']:
+            up = self.ping(bind_key)
+            self._checks[bind_key] = (now, up)
+        return up
+
+    def ping(self, bind_key):
+        try:
+            with db.engines[bind_key].connect() as connection:
+                connection.execute(text("SELECT 1"))
+            return True
+        except Exception as e:
+            self._app.logger.warning("Read replica %s is down: %s", bind_key, e)
+            return False
+
+    def mark_down(self, engine):
+        for bind_key in self._app.config['READ_REPLICA_BINDS']:
+            if db.engines[bind_key] is engine:
+                self._checks[bind_key] = (time.monotonic(), False)
+
+    def status(self):
+        """
+        :return: Dictionary from replica bind key to whether it passed its last health check.
+        """
+        return {bind_key: self._checks.get(bind_key, (None, False))[1]
+                for bind_key in self._app.config['READ_REPLICA_BINDS']}
+
+
+replica_router = ReplicaRouter(application)
+
+
+@event.listens_for(Engine, "handle_error")
+def mark_replica_down(context):
+    if context.is_disconnect and application.config['READ_REPLICA_BINDS']:
+        replica_router.mark_down(context.engine)
+
+
+# Sends the queries of a read-only route to a read replica; place it between @application.route and the
+# authentication decorator, and only on routes that never need to see a write made by an earlier request right away.
+# Raw SQL moves the request to the primary unless text_reads=True, and routes locking rows with SELECT ... FOR UPDATE
+# must not use it, as a locking read cannot be told apart from a plain one before it runs
+def use_read_replica(text_reads=False):
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            if not application.config['READ_REPLICA_BINDS']:
+                return fn(*args, **kwargs)
+            session = db.session()
+            session.info["read_replica"] = True
+            session.info["read_replica_text_reads"] = text_reads
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                session.info.pop("read_replica", None)
+                session.info.pop("read_replica_text_reads", None)
+
+        return decorator
+
+    return wrapper
+
+
 class Employee(db.Model):
     __tablename__ = 'employees'
 
@@ -70,19 +466,47 @@ class Employee(db.Model):
     employee_middle_name = db.Column(db.String(255))
     employee_last_name = db.Column(db.String(255))
 
+    def to_front_end(self):
+        return {"id": self.employee_id,
+                "firstName": self.employee_first_name,
+                "middleName": self.employee_middle_name,
+                "lastName": self.employee_last_name
+                }
+
 
 class EmployerRelation(db.Model):
     __tablename__ = 'employer_relations'
+    __table_args__ = (
+        db.Index('idx_employer_relations_parent_child', 'parent_employer_id', 'child_employer_id'),
+        db.Index('idx_employer_relations_child_parent', 'child_employer_id', 'parent_employer_id'),
+        db.Index('idx_employer_relations_start_date', 'employer_relation_start_date'),
+    )
 
     employer_relation_id = db.Column(db.Integer, primary_key=True)
     parent_employer_id = db.Column(db.Integer)
     child_employer_id = db.Column(db.Integer)
     employer_relation_type = db.Column(db.String(255))
-    employer_relation_start_date = db.Column(db.String(10))
+    employer_relation_start_date = db.Column(db.Date)
+
+    def to_graph_edge(self):
+        return {"id": str(self.employer_relation_id),
+                "source": str(self.parent_employer_id),
+                "target": str(self.child_employer_id),
+                "relationType": self.employer_relation_type,
+                "startDate": format_date(self.employer_relation_start_date)
+                }
 
 
 class Employer(db.Model):
     __tablename__ = 'employers'
+    __table_args__ = (
+        db.Index('idx_employers_component_id', 'employer_component_id'),
+        db.Index('idx_employers_state_city', 'employer_addr_state', 'employer_addr_city'),
+        db.Index('idx_employers_status', 'employer_status'),
+        db.Index('idx_employers_industry_sector_code', 'employer_industry_sector_code'),
+        db.Index('idx_employers_founded_date', 'employer_founded_date'),
+        db.Index('idx_employers_dissolved_date', 'employer_dissolved_date'),
+    )
 
     employer_id = db.Column(db.Integer, primary_key=True)
     employer_name = db.Column(db.String(255))
@@ -91,12 +515,14 @@ class Employer(db.Model):
     employer_addr_city = db.Column(db.String(255))
     employer_addr_state = db.Column(db.String(255))
     employer_addr_zip_code = db.Column(db.String(255))
-    employer_founded_date = db.Column(db.String(10))
-    employer_dissolved_date = db.Column(db.String(10))
-    employer_bankruptcy_date = db.Column(db.String(10))
+    employer_founded_date = db.Column(db.Date)
+    employer_dissolved_date = db.Column(db.Date)
+    employer_bankruptcy_date = db.Column(db.Date)
     employer_industry_sector_code = db.Column(db.Integer)
     employer_status = db.Column(db.String(255))
     employer_legal_status = db.Column(db.String(255))
+    # Id of the connected lineage the employer belongs to (the smallest employer id in it), NULL until backfilled
+    employer_component_id = db.Column(db.Integer)
 
     def to_front_end(self):
         return {"id": self.employer_id,
@@ -108,24 +534,76 @@ class Employer(db.Model):
                     "state": self.employer_addr_state,
                     "zipCode": self.employer_addr_zip_code,
                 },
-                "foundedDate": self.employer_founded_date,
-                "dissolvedDate": self.employer_dissolved_date,
-                "bankruptcyDate": self.employer_bankruptcy_date,
+                "foundedDate": format_date(self.employer_founded_date),
+                "dissolvedDate": format_date(self.employer_dissolved_date),
+                "bankruptcyDate": format_date(self.employer_bankruptcy_date),
                 "industrySectorCode": self.employer_industry_sector_code,
                 "status": self.employer_status,
                 "legalStatus": self.employer_legal_status
                 }
 
+    def to_graph_node(self, position=(0, 0)):
+        return {"id": str(self.employer_id),
+                "name": self.employer_name,
+                "estDate": format_date(self.employer_founded_date),
+                "position": {"x": position[0], "y": position[1]}
+                }
+
+
+class EmployerLineage(db.Model):
+    """
+    Transitive closure of employer_relations: one row per distinct (depth, relation types) path from an ancestor
+    employer to a descendant employer. The mask has the RELATION_TYPE_BITS of every relation along the path set.
+    """
+    __tablename__ = 'employer_lineage'
+    __table_args__ = (
+        db.Index('idx_employer_lineage_descendant', 'descendant_employer_id'),
+    )
+
+    ancestor_employer_id = db.Column(db.Integer, primary_key=True)
+    descendant_employer_id = db.Column(db.Integer, primary_key=True)
+    lineage_depth = db.Column(db.Integer, primary_key=True)
+    lineage_relation_mask = db.Column(db.Integer, primary_key=True)
+
 
 class Employment(db.Model):
     __tablename__ = 'employments'
+    __table_args__ = (
+        db.Index('idx_employments_employee_id', 'employee_id'),
+        db.Index('idx_employments_employer_id', 'employer_id'),
+    )
 
     employment_id = db.Column(db.Integer, primary_key=True)
     employee_id = db.Column(db.Integer)
     employer_id = db.Column(db.Integer)
     job_title = db.Column(db.String(255))
-    start_date = db.Column(db.String(10))
-    end_date = db.Column(db.String(10))
+    start_date = db.Column(db.Date)
+    end_date = db.Column(db.Date)
+
+    def to_front_end(self):
+        return {"id": self.employment_id,
+                "jobTitle": self.job_title,
+                "startDate": format_date(self.start_date),
+                "endDate": format_date(self.end_date)
+                }
+
+
+class EmploymentRollup(db.Model):
+    """
+    Monthly changes to the workforce of an employer, kept up to date as employments are added and closed. Every
+    column holds the change within the month, so headcounts are running totals over the months up to a date, and
+    rollup_start_day_total (the change in the sum of the start date ordinals of the active employees) gives their
+    total tenure on any date.
+    """
+    __tablename__ = 'employment_rollups'
+
+    employer_id = db.Column(db.Integer, primary_key=True)
+    # First day of the month
+    rollup_month = db.Column(db.Date, primary_key=True)
+    rollup_hires = db.Column(db.Integer, default=0)
+    rollup_separations = db.Column(db.Integer, default=0)
+    rollup_separated_tenure_days = db.Column(db.BigInteger, default=0)
+    rollup_start_day_total = db.Column(db.BigInteger, default=0)
 
 
 class NAICSCode(db.Model):
@@ -149,6 +627,39 @@ class User(db.Model):
     access_permissions = db.Column(db.Integer)
 
 
+class DataVersion(db.Model):
+    __tablename__ = 'data_versions'
+
+    data_version_name = db.Column(db.String(64), primary_key=True)
+    data_version_number = db.Column(db.Integer, nullable=False, default=0)
+
+
+class EmailOutbox(db.Model):
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        db.Index('idx_email_outbox_status', 'email_status'),
+    )
+
+    email_outbox_id = db.Column(db.Integer, primary_key=True)
+    # Only one email per key is ever queued: enqueueing again replaces the payload of the queued email
+    email_dedupe_key = db.Column(db.String(255), unique=True)
+    email_payload = db.Column(db.Text)
+    # "pending", "sending" (claimed by a dispatcher until email_next_attempt_datetime), "sent" or "failed"
+    email_status = db.Column(db.String(16))
+    email_attempts = db.Column(db.Integer, default=0)
+    email_next_attempt_datetime = db.Column(db.DateTime)
+    email_last_error = db.Column(db.String(255))
+    email_created_datetime = db.Column(db.DateTime)
+
+
+class SchemaMigration(db.Model):
+    __tablename__ = 'schema_migrations'
+
+    schema_migration_version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    schema_migration_name = db.Column(db.String(255))
+    schema_migration_applied_datetime = db.Column(db.DateTime)
+
+
 class InternalServerError(Exception):
     pass
 
@@ -157,6 +668,10 @@ class EmailSendingError(Exception):
     pass
 
 
+class QueryBudgetExceeded(Exception):
+    pass
+
+
 def error_response(error_message, error_code):
     """
     Create an error response with an error message and a status code.
@@ -188,22 +703,430 @@ def success_response(message, success_code, data=None):
     return jsonify(response_data), success_code
 
 
-def send_verification_email(email, first_name):
+class CacheBackend(Protocol):
+    """
+    Storage behind the response cache. A shared implementation (e.g. on top of Redis) lets every worker see the same
+    entries and invalidations; it is configured with RESPONSE_CACHE_BACKEND="module:Class" and built from the app.
+    """
+
+    def get(self, key):
+        """Return the value stored under key, or None."""
+
+    def set(self, key, value, ttl, tags):
+        """Store value under key for ttl seconds, remembering that it depends on each of the tags."""
+
+    def invalidate_tags(self, tags):
+        """Remove every entry stored with any of the tags."""
+
+    def clear(self):
+        """Remove every entry."""
+
+
+class LRUCacheBackend:
+    """
+    In-process CacheBackend evicting the least recently used entries once the entry count or the total size of the
+    cached values exceeds its limits. Expired entries are dropped when they are read.
+    """
+
+    def __init__(self, max_entries, max_bytes):
+        self._lock = threading.Lock()
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._size = 0
+        self.evictions = 0
+
+    def _remove(self, key):
+        value, expires, tags = self._entries.pop(key)
+        self._size -= len(value)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value, ttl, tags):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if len(value) > self._max_bytes:
+                return
+            self._entries[key] = (value, time.monotonic() + ttl, tuple(tags))
+            self._size += len(value)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self._max_entries or self._size > self._max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_tags(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size, "evictions": self.evictions}
+
+
+class ResponseCache:
+    """
+    Cache of serialized JSON responses for the read routes.
+
+    Keys combine the route, its normalized parameters and the data versions the response was built from, so a
+    version bump by any worker stops old entries from being served. Entries are also tagged with what they depend
+    on (e.g. "employer:5"), so the admin routes can evict exactly the responses they made stale.
+    """
+
+    def __init__(self, app):
+        self._app = app
+        self._backend = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            backend_name = self._app.config['RESPONSE_CACHE_BACKEND']
+            if backend_name == 'memory':
+                self._backend = LRUCacheBackend(self._app.config['RESPONSE_CACHE_MAX_ENTRIES'],
+                                                self._app.config['RESPONSE_CACHE_MAX_BYTES'])
+            elif backend_name != 'none':
+                module_name, class_name = backend_name.split(':')
+                self._backend = getattr(import_module(module_name), class_name)(self._app)
+        return self._backend
+
+    def key(self, route, params, versions):
+        """
+        Build the cache key of a response.
+
+        :param route: The name of the route.
+        :param params: A mapping of the request parameters the response depends on.
+        :param versions: A mapping of the data versions the response is built from to their current values.
+
+        :return: The cache key, or None if caching is disabled.
+        """
+        if self.backend is None:
+            return None
+        return versioned_key(route, params, versions)
+
+    def get(self, key):
+        """
+        :return: The cached response for key, with the ETag it was stored with, or None.
+        """
+        if key is None:
+            return None
+        entry = self.backend.get(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if entry is None:
+            return None
+        etag, body = entry.split(b" ", 1)
+        response = self._app.response_class(body, status=200, mimetype="application/json")
+        response.set_etag(etag.decode())
+        return response
+
+    def store(self, key, response, tags, etag):
+        """
+        Cache a response if it succeeded.
+
+        :param key: The key built by ResponseCache.key.
+        :param response: A (response, status code) tuple as returned by success_response.
+        :param tags: What the response depends on, e.g. ["employers", "employer:5"].
+        :param etag: The ETag of the response, which is served along with the cached body.
+        """
+        body, status_code = response
+        if key is not None and status_code == 200:
+            self.backend.set(key, etag.encode() + b" " + body.get_data(), self._app.config['RESPONSE_CACHE_TTL'],
+                             tags)
+
+    def invalidate(self, tags):
+        if self.backend is not None:
+            self.backend.invalidate_tags(tags)
+
+    def stats(self):
+        with self._lock:
+            stats = {"hits": self.hits, "misses": self.misses}
+        if hasattr(self.backend, "stats"):
+            stats.update(self.backend.stats())
+        return stats
+
+
+response_cache = ResponseCache(application)
+
+
+def versioned_key(route, params, versions):
+    normalized_params = "&".join(f"{name}={params[name]}" for name in sorted(params))
+    normalized_versions = ",".join(f"{name}:{versions[name]}" for name in sorted(versions))
+    return f"{route}?{normalized_params}#{normalized_versions}"
+
+
+def versioned_response(route, params, version_names, cache_version_names, build_response):
+    """
+    Serve a read route with a strong ETag derived from data versions, backed by the response cache.
+
+    The ETag only depends on the route, its parameters and the data versions, so a matching If-None-Match is
+    answered with 304 after a single query on data_versions, without loading or serializing anything.
+
+    :param route: The name of the route.
+    :param params: A mapping of the request parameters the response depends on.
+    :param version_names: The data versions the response is built from.
+    :param cache_version_names: The subset of version_names the cached response is keyed on; changes covered by
+        the other versions are evicted from the cache through tags instead. Cached entries are served with the ETag
+        they were built under, so an entry another worker's change has not evicted yet is never revalidated as
+        current.
+    :param build_response: A function returning a tuple ((response, status code), cache tags).
+
+    :return: A (response, status code) tuple.
+    """
+    versions = get_data_versions(version_names)
+    etag = hashlib.sha256(versioned_key(route, params, versions).encode()).hexdigest()
+    if request.if_none_match.contains(etag):
+        not_modified = application.response_class(status=304)
+        not_modified.set_etag(etag)
+        return not_modified, 304
+
+    cache_key = response_cache.key(route, params, {name: versions[name] for name in cache_version_names})
+    cached_response = response_cache.get(cache_key)
+    if cached_response:
+        # The entry may predate a change to a version it is not keyed on, made by another worker. Serving it with the
+        # ETag it was built under keeps later If-None-Match requests from turning it into a 304 for the new versions
+        return cached_response, 200
+
+    response, tags = build_response()
+    if response[1] == 200:
+        response[0].set_etag(etag)
+    response_cache.store(cache_key, response, tags, etag)
+    return response
+
+
+def invalidate_employer_caches(employer_ids, employer_list=True):
     """
-    Send a verification email to the given email address.
+    Evict the cached responses made stale by an admin write.
+
+    :param employer_ids: The employers whose rows or relations changed; every cached graph containing them is evicted.
+    :param employer_list: Whether the employer rows changed, which evicts every cached employer list.
+    """
+    tags = [f"employer:{employer_id}" for employer_id in employer_ids]
+    if employer_list:
+        tags.append("employers")
+    response_cache.invalidate(tags)
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+
+def metric_labels(label_names, label_values):
+    labels = []
+    for name, value in zip(label_names, label_values):
+        value = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        labels.append(f'{name}="{value}"')
+    return ",".join(labels)
+
+
+def metric_series(name, labels):
+    return f"{name}{{{labels}}}" if labels else name
+
+
+class MetricHistogram:
+    """
+    Prometheus histogram keeping one row of bucket counts per combination of label values.
+
+    Observations only add to the bucket they fall in; the cumulative counts Prometheus expects are summed up when
+    the histogram is rendered, so recording stays a bisect and two additions.
+    """
+
+    def __init__(self, name, documentation, label_names, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, label_values, value):
+        """
+        :param label_values: A tuple of label values, in the order of label_names.
+        :param value: The observed value.
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # One count per bucket, one for +Inf, then the sum of the observed values
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        with self._lock:
+            series = {label_values: list(counts) for label_values, counts in self._series.items()}
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for label_values in sorted(series):
+            counts = series[label_values]
+            labels = metric_labels(self.label_names, label_values)
+            prefix = labels + "," if labels else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f"{metric_series(self.name + '_sum', labels)} {counts[-1]}")
+            lines.append(f"{metric_series(self.name + '_count', labels)} {cumulative}")
+        return lines
+
+
+class MetricCounter:
+    """
+    Prometheus counter keeping one total per combination of label values.
+    """
+
+    def __init__(self, name, documentation, label_names):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def inc(self, label_values, amount=1):
+        with self._lock:
+            self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def render(self):
+        with self._lock:
+            series = dict(self._series)
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for label_values in sorted(series):
+            lines.append(f"{metric_series(self.name, metric_labels(self.label_names, label_values))} "
+                         f"{series[label_values]}")
+        return lines
+
+
+request_latency = MetricHistogram("http_request_duration_seconds", "Time spent handling requests.",
+                                  ("route", "method", "status"), LATENCY_BUCKETS)
+request_statements = MetricHistogram("http_request_db_statements", "SQL statements run per request.",
+                                     ("route", "method"), STATEMENT_BUCKETS)
+request_db_time = MetricCounter("http_request_db_seconds_total",
+                                "Time spent running SQL statements during requests.", ("route", "method"))
+email_api_latency = MetricHistogram("email_api_request_duration_seconds",
+                                    "Time spent posting emails to the email API.", ("outcome",), LATENCY_BUCKETS)
+pool_wait_time = MetricHistogram("db_pool_wait_seconds", "Time spent waiting for a database connection.", (),
+                                 POOL_WAIT_BUCKETS)
+pool_timeouts = MetricCounter("db_pool_timeouts_total", "Database connection checkouts that timed out.", ())
+
+
+def render_pool_metrics():
+    """
+    :return: Prometheus text lines with the state of the connection pool of every database engine.
+    """
+    gauges = {
+        "db_pool_size": ("Connections the pool keeps open.", []),
+        "db_pool_checked_out": ("Connections currently in use.", []),
+        "db_pool_idle": ("Open connections waiting in the pool.", []),
+        "db_pool_overflow": ("Connections opened beyond the pool size.", []),
+    }
+    for bind_key, engine in db.engines.items():
+        pool = engine.pool
+        if not isinstance(pool, QueuePool):
+            continue
+        labels = metric_labels(("bind",), (bind_key or "default",))
+        for name, value in (("db_pool_size", pool.size()), ("db_pool_checked_out", pool.checkedout()),
+                            ("db_pool_idle", pool.checkedin()), ("db_pool_overflow", max(pool.overflow(), 0))):
+            gauges[name][1].append(f"{metric_series(name, labels)} {value}")
+    lines = []
+    for name, (documentation, series) in gauges.items():
+        lines.extend([f"# HELP {name} {documentation}", f"# TYPE {name} gauge"] + series)
+    return lines
+
+
+def warm_up_connection_pool():
+    """
+    Open as many connections as every pool keeps, then hand them back to their pool.
+
+    :return: The number of connections opened.
+    """
+    opened = 0
+    with application.app_context():
+        for engine in db.engines.values():
+            pool_size = engine.pool.size() if isinstance(engine.pool, QueuePool) else 1
+            connections = []
+            try:
+                for _ in range(pool_size):
+                    connections.append(engine.raw_connection())
+            except Exception as e:
+                application.logger.warning("Could not warm up the connection pool: %s", e)
+            finally:
+                opened += len(connections)
+                for connection in connections:
+                    connection.close()
+    return opened
+
+
+if application.config['DB_POOL_WARM_UP']:
+    warm_up_connection_pool()
+
+
+def render_metrics():
+    """
+    :return: The metrics of this worker process in the Prometheus text exposition format.
+    """
+    lines = []
+    for metric in (request_latency, request_statements, request_db_time, email_api_latency, pool_wait_time,
+                   pool_timeouts):
+        lines.extend(metric.render())
+    lines.extend(render_pool_metrics())
+    lines.append("# HELP db_replica_up Whether the read replica passed its last health check.")
+    lines.append("# TYPE db_replica_up gauge")
+    for bind_key, up in replica_router.status().items():
+        lines.append(f'db_replica_up{{bind="{bind_key}"}} {int(up)}')
+    cache_stats = response_cache.stats()
+    lines.append("# HELP response_cache_requests_total Response cache lookups.")
+    lines.append("# TYPE response_cache_requests_total counter")
+    lines.append(f'response_cache_requests_total{{result="hit"}} {cache_stats["hits"]}')
+    lines.append(f'response_cache_requests_total{{result="miss"}} {cache_stats["misses"]}')
+    return "\n".join(lines) + "\n"
+
+
+def queue_verification_email(email, first_name):
+    """
+    Queue a verification email to the given email address in the current transaction.
 
     :param email: The recipient's email address.
     :param first_name: The recipient's first name.
 
     :raises InternalServerError: If there is an internal server error, such as missing environment variables.
-    :raises EmailSendingError: If there is an error while sending the email through the external service.
 
-    Note that this function does not return any values upon success but raises exceptions when errors occur.
+    Note that the email is only sent by the email dispatcher once the transaction commits.
     """
     api_url = environ.get("API_URL")
     email_admin_token = environ.get("EMAIL_ADMIN_TOKEN")
 
-    if not api_url or not email_admin_token:
+    if not api_url or not email_admin_token or not environ.get("GMAIL_API_URL"):
         raise InternalServerError("Internal server error")
 
     # Define amount of time before token expires
@@ -219,34 +1142,1339 @@ def send_verification_email(email, first_name):
         'admin_token': email_admin_token,
         'type': "user_verification"
     }
+    queue_email(f"user_verification:{email}", data)
+
+
+def queue_email(dedupe_key, data):
+    """
+    Add an email to the outbox in the current transaction.
+
+    If an email with the same key is already in the outbox, it is requeued with the new data instead of adding a
+    second email, so e.g. repeated registrations only ever send the latest verification link.
+
+    :param dedupe_key: Key identifying the email, e.g. "<email type>:<recipient>".
+    :param data: The form data to post to the email API.
+    """
+    now = datetime.utcnow()
+    outbox_email = EmailOutbox.query.filter_by(email_dedupe_key=dedupe_key).first()
+    if not outbox_email:
+        outbox_email = EmailOutbox(email_dedupe_key=dedupe_key, email_created_datetime=now)
+        db.session.add(outbox_email)
+
+    outbox_email.email_payload = json.dumps(data)
+    outbox_email.email_status = "pending"
+    outbox_email.email_attempts = 0
+    outbox_email.email_next_attempt_datetime = now
+    outbox_email.email_last_error = None
+
+
+def get_data_version(name):
+    """
+    Read the current value of a data version counter.
+
+    :param name: The name of the counter in the data_versions table.
+
+    :return: The counter value, or 0 if the counter does not exist yet.
+    """
+    version = db.session.execute(
+        select(DataVersion.data_version_number).where(DataVersion.data_version_name == name)
+    ).scalar()
+    return version or 0
+
+
+def get_data_versions(names):
+    """
+    Read the current values of several data version counters with one query.
+
+    :param names: The names of the counters in the data_versions table.
+
+    :return: A dictionary from counter name to value, with 0 for counters that do not exist yet.
+    """
+    versions = dict(db.session.execute(
+        select(DataVersion.data_version_name, DataVersion.data_version_number)
+        .where(DataVersion.data_version_name.in_(names))
+    ).all())
+    return {name: versions.get(name, 0) for name in names}
+
+
+def bump_data_version(name):
+    """
+    Increment a data version counter as part of the current transaction.
+
+    :param name: The name of the counter in the data_versions table.
+
+    :return: The new counter value, which becomes visible to other workers once the transaction commits.
+    """
+    result = db.session.execute(
+        update(DataVersion)
+        .where(DataVersion.data_version_name == name)
+        .values(data_version_number=DataVersion.data_version_number + 1)
+    )
+    if result.rowcount == 0:
+        db.session.add(DataVersion(data_version_name=name, data_version_number=1))
+        db.session.flush()
+        return 1
+    return get_data_version(name)
+
+
+class EmployerRelationIndex:
+    """
+    In-process adjacency index over the employer_relations table.
+
+    Relations are stored column-wise in typed arrays and each employer maps to an array of positions into them,
+    which keeps the index compact enough to hold the whole table. The index loads lazily and remembers the
+    employer_relations data version it reflects; routes that add relations apply them in place after committing,
+    and any other change to the version (e.g. a write handled by another worker) triggers a reload.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._reset()
+
+    def _reset(self):
+        self._relation_ids = array('q')
+        self._parent_ids = array('q')
+        self._child_ids = array('q')
+        self._relation_types = []
+        self._start_dates = []
+        self._children = {}
+        self._parents = {}
+
+    def _append(self, relation_id, parent_id, child_id, relation_type, start_date):
+        position = len(self._relation_ids)
+        self._relation_ids.append(relation_id)
+        self._parent_ids.append(parent_id)
+        self._child_ids.append(child_id)
+        # Relation types repeat heavily, so share a single string object per type
+        self._relation_types.append(sys.intern(relation_type) if relation_type else relation_type)
+        self._start_dates.append(start_date)
+        self._children.setdefault(parent_id, array('q')).append(position)
+        self._parents.setdefault(child_id, array('q')).append(position)
+
+    def _load(self):
+        # The version is read first and in the same transaction as the relations, so a concurrent write can at
+        # worst make the loaded copy look older than it is, which only causes an extra reload
+        version = get_data_version(EMPLOYER_RELATIONS_VERSION)
+        rows = db.session.execute(select(
+            EmployerRelation.employer_relation_id,
+            EmployerRelation.parent_employer_id,
+            EmployerRelation.child_employer_id,
+            EmployerRelation.employer_relation_type,
+            EmployerRelation.employer_relation_start_date
+        ).order_by(EmployerRelation.employer_relation_id))
+
+        self._reset()
+        for row in rows:
+            self._append(*row)
+        self._version = version
+
+    def ensure_current(self):
+        """
+        Reload the index if the employer_relations data version has moved past the loaded copy.
+        """
+        # A read replica may lag behind the version this worker already applied, which must not cause a reload
+        version = get_data_version(EMPLOYER_RELATIONS_VERSION)
+        with self._lock:
+            if self._version is None or version > self._version:
+                self._load()
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+
+    def add_relations(self, version, relation_rows):
+        """
+        Apply relations committed by this worker without reloading the whole table.
+
+        :param version: The employer_relations data version produced by the commit that added the relations.
+        :param relation_rows: Tuples of (relation id, parent id, child id, relation type, start date).
+        """
+        with self._lock:
+            if self._version is None:
+                return
+            if version != self._version + 1:
+                # Another worker changed the relations in between, fall back to a full reload on next use
+                self._version = None
+                return
+            for row in relation_rows:
+                self._append(*row)
+            self._version = version
+
+    def component(self, employer_ids):
+        """
+        Find every employer connected to the given employers.
+
+        :param employer_ids: The employer ids to start the traversal from.
+
+        :return: A tuple (employer_ids, relations) with the connected employer ids in breadth-first order and
+            the relations between them as transient EmployerRelation objects.
+        """
+        with self._lock:
+            ordered_ids = list(dict.fromkeys(employer_ids))
+            visited_ids = set(ordered_ids)
+            positions = set()
+            frontier = ordered_ids
+
+            while frontier:
+                next_frontier = []
+                for employer_id in frontier:
+                    for adjacency, endpoints in ((self._children, self._child_ids),
+                                                 (self._parents, self._parent_ids)):
+                        for position in adjacency.get(employer_id, ()):
+                            positions.add(position)
+                            related_id = endpoints[position]
+                            if related_id not in visited_ids:
+                                visited_ids.add(related_id)
+                                next_frontier.append(related_id)
+                ordered_ids.extend(next_frontier)
+                frontier = next_frontier
+
+            relations = [EmployerRelation(
+                employer_relation_id=self._relation_ids[position],
+                parent_employer_id=self._parent_ids[position],
+                child_employer_id=self._child_ids[position],
+                employer_relation_type=self._relation_types[position],
+                employer_relation_start_date=self._start_dates[position]
+            ) for position in sorted(positions)]
+
+        return ordered_ids, relations
+
+
+employer_relation_index = EmployerRelationIndex()
+
+# Minimum trigram similarity (shared trigrams over all distinct trigrams of both names) of a fuzzy search match
+NAME_SEARCH_SIMILARITY = 0.3
+# Bounds on the work of a fuzzy search: trigram positions counted and names scored
+NAME_SEARCH_MAX_POSTINGS = 5000
+NAME_SEARCH_MAX_CANDIDATES = 300
+
+
+def normalize_employer_name(name):
+    return " ".join(name.casefold().split()) if name else ""
+
+
+def name_trigrams(normalized_name):
+    padded = f"  {normalized_name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class EmployerNameIndex:
+    """
+    In-process search index over employer names.
+
+    Names are normalized (case folded, whitespace collapsed) and kept in a sorted list, so prefix lookups are a
+    binary search, plus an inverted index from each trigram to an array of the positions of the names containing it
+    for fuzzy matches. Like EmployerRelationIndex it loads lazily, follows the employers data version, and applies
+    the changes committed by this worker in place. Removed or renamed entries are left as tombstones in the trigram
+    lists until enough of them pile up to warrant a reload.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._reset()
+
+    def _reset(self):
+        self._ids = array('q')
+        self._names = []
+        self._keys = []
+        self._trigram_counts = array('H')
+        self._sorted_keys = []
+        self._sorted_positions = array('q')
+        self._trigrams = {}
+        self._positions = {}
+        self._removed = 0
+
+    def _add(self, employer_id, name):
+        key = normalize_employer_name(name)
+        if key == name:
+            key = name
+        position = len(self._ids)
+        self._ids.append(employer_id)
+        self._names.append(name)
+        self._keys.append(key)
+        self._positions[employer_id] = position
+        index = bisect.bisect_right(self._sorted_keys, key)
+        self._sorted_keys.insert(index, key)
+        self._sorted_positions.insert(index, position)
+        trigrams = name_trigrams(key)
+        self._trigram_counts.append(len(trigrams))
+        for trigram in trigrams:
+            self._trigrams.setdefault(trigram, array('q')).append(position)
+
+    def _remove(self, employer_id):
+        position = self._positions.pop(employer_id, None)
+        if position is None:
+            return
+        key = self._keys[position]
+        index = bisect.bisect_left(self._sorted_keys, key)
+        while self._sorted_positions[index] != position:
+            index += 1
+        del self._sorted_keys[index]
+        del self._sorted_positions[index]
+        self._keys[position] = None
+        self._removed += 1
+
+    def _load(self):
+        version = get_data_version(EMPLOYERS_VERSION)
+        rows = db.session.execute(select(Employer.employer_id, Employer.employer_name)
+                                  .order_by(Employer.employer_id))
+        self._reset()
+        # Build the sorted list in one go rather than inserting the names one by one
+        sorted_keys = []
+        for employer_id, name in rows:
+            key = normalize_employer_name(name)
+            if key == name:
+                key = name
+            position = len(self._ids)
+            self._ids.append(employer_id)
+            self._names.append(name)
+            self._keys.append(key)
+            self._positions[employer_id] = position
+            sorted_keys.append((key, position))
+            trigrams = name_trigrams(key)
+            self._trigram_counts.append(len(trigrams))
+            for trigram in trigrams:
+                self._trigrams.setdefault(trigram, array('q')).append(position)
+        sorted_keys.sort()
+        self._sorted_keys = [key for key, _ in sorted_keys]
+        self._sorted_positions = array('q', (position for _, position in sorted_keys))
+        self._version = version
+
+    def ensure_current(self):
+        """
+        Reload the index if the employers data version has moved past the loaded copy.
+        """
+        version = get_data_version(EMPLOYERS_VERSION)
+        with self._lock:
+            if self._version is None or version > self._version:
+                self._load()
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+
+    def apply(self, version, names=(), removed_ids=()):
+        """
+        Apply employer changes committed by this worker without reloading every name.
+
+        :param version: The employers data version produced by the commit that made the changes.
+        :param names: Tuples of (employer id, name) for added or renamed employers.
+        :param removed_ids: Ids of deleted employers.
+        """
+        with self._lock:
+            if self._version is None:
+                return
+            if version != self._version + 1:
+                # Another worker changed the employers in between, fall back to a full reload on next use
+                self._version = None
+                return
+            for employer_id in removed_ids:
+                self._remove(employer_id)
+            for employer_id, name in names:
+                position = self._positions.get(employer_id)
+                if position is not None and self._names[position] == name:
+                    continue
+                self._remove(employer_id)
+                self._add(employer_id, name)
+            self._version = version
+            if self._removed > 1000 and self._removed > len(self._ids) // 2:
+                self._version = None
+
+    def search(self, query, limit):
+        """
+        Find the employers best matching a name.
+
+        Exact matches rank first, then names starting with the query, then names whose trigram similarity to the
+        query reaches NAME_SEARCH_SIMILARITY. A name that similar shares at least NAME_SEARCH_SIMILARITY of the query
+        trigrams, so it appears in one of the shortest position lists of the query trigrams, all but that many minus
+        one. Those lists are counted, shortest first and up to NAME_SEARCH_MAX_POSTINGS positions, and the names
+        counted most often are scored, skipping those too long to reach the similarity with the trigrams they may
+        share, up to NAME_SEARCH_MAX_CANDIDATES of them. When the budget cuts the counting short, names sharing only
+        very common trigrams with the query can be missed.
+
+        Only the prefix lookup holds the lock. The fuzzy matches are found in the lists and arrays the index only
+        appends to, or replaces as a whole on reload, so a concurrent change at worst misses or returns the names it
+        changes.
+
+        :param query: The name to search for.
+        :param limit: The maximum number of matches.
+
+        :return: List of (employer id, name, match type, similarity) tuples, best match first.
+        """
+        key = normalize_employer_name(query)
+        if not key or limit <= 0:
+            return []
+        query_trigrams = name_trigrams(key)
+        query_count = len(query_trigrams)
+
+        # Matches map positions to (match type, similarity, normalized name)
+        matches = {}
+        with self._lock:
+            index = bisect.bisect_left(self._sorted_keys, key)
+            while index < len(self._sorted_keys) and len(matches) < limit:
+                name_key = self._sorted_keys[index]
+                if not name_key.startswith(key):
+                    break
+                position = self._sorted_positions[index]
+                shared = len(query_trigrams & name_trigrams(name_key))
+                similarity = shared / (query_count + self._trigram_counts[position] - shared)
+                matches[position] = (0 if name_key == key else 1, similarity, name_key)
+                index += 1
+            postings = sorted((self._trigrams.get(trigram, ()) for trigram in query_trigrams), key=len)
+            ids, names, keys, trigram_counts = self._ids, self._names, self._keys, self._trigram_counts
+
+        if len(matches) < limit:
+            min_shared = math.ceil(NAME_SEARCH_SIMILARITY * query_count)
+            counts = Counter()
+            counted = 0
+            total = 0
+            for positions in postings[:query_count - min_shared + 1]:
+                total += len(positions)
+                if counted and total > NAME_SEARCH_MAX_POSTINGS:
+                    break
+                counts.update(positions)
+                counted += 1
+            skipped = query_count - counted
+            # A name counted n times shares at most n + skipped trigrams, which caps the trigram count of a name
+            # reaching the similarity
+            max_name_counts = [int((count + skipped) * (1 + NAME_SEARCH_SIMILARITY) / NAME_SEARCH_SIMILARITY + 1e-9)
+                               - query_count for count in range(counted + 1)]
+
+            scored = 0
+            for position, count in sorted(counts.items(), key=itemgetter(1), reverse=True):
+                if count + skipped < min_shared or scored == NAME_SEARCH_MAX_CANDIDATES:
+                    break
+                name_key = keys[position]
+                if trigram_counts[position] > max_name_counts[count] or position in matches or name_key is None:
+                    continue
+                scored += 1
+                shared = len(query_trigrams & name_trigrams(name_key))
+                similarity = shared / (query_count + trigram_counts[position] - shared)
+                if similarity >= NAME_SEARCH_SIMILARITY:
+                    matches[position] = (2, similarity, name_key)
+
+        best = heapq.nsmallest(limit, matches.items(), key=lambda match: (match[1][0], -match[1][1], match[1][2]))
+        match_types = ("exact", "prefix", "fuzzy")
+        return [(ids[position], names[position], match_types[match_type], similarity)
+                for position, (match_type, similarity, name_key) in best]
+
+    def stats(self):
+        """
+        :return: Dictionary with the number of indexed names and the approximate memory held by the index.
+        """
+        with self._lock:
+            names = len(self._positions)
+            size = sum(map(sys.getsizeof, (self._ids, self._names, self._keys, self._trigram_counts, self._sorted_keys,
+                                           self._sorted_positions, self._trigrams, self._positions)))
+            size += sum(sys.getsizeof(name) for name in self._names)
+            size += sum(sys.getsizeof(key) for key, name in zip(self._keys, self._names) if key is not name)
+            size += sum(sys.getsizeof(trigram) + sys.getsizeof(positions)
+                        for trigram, positions in self._trigrams.items())
+            return {"names": names, "bytes": size, "bytesPerName": round(size / names, 1) if names else 0,
+                    "loaded": self._version is not None}
+
+
+employer_name_index = EmployerNameIndex()
+
+
+class NAICSSectorMap:
+    """
+    Read-only in-process copy of the naics_codes table, mapping each sector code to its definition from the latest
+    release. Every load builds a new MappingProxyType and swaps it in, so readers can keep using the mapping they
+    got without locking. The copy follows the naics_codes data version, which the refresh route bumps.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._sectors = MappingProxyType({})
+
+    def ensure_current(self, version=None):
+        """
+        Reload the sectors if the naics_codes data version has moved past the loaded copy.
+
+        :param version: The current naics_codes data version, if already read.
+
+        :return: The current sector mapping.
+        """
+        if version is None:
+            version = get_data_version(NAICS_CODES_VERSION)
+        with self._lock:
+            if self._version is None or version > self._version:
+                sectors = {}
+                for code, definition in db.session.execute(
+                        select(NAICSCode.naics_sector_code, NAICSCode.naics_sector_definition)
+                        .order_by(NAICSCode.naics_release_year, NAICSCode.naics_code_id)):
+                    sectors[code] = definition
+                self._sectors = MappingProxyType(sectors)
+                self._version = version
+            return self._sectors
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+
+
+naics_sector_map = NAICSSectorMap()
+
+# Employer columns counted by the facet route, by the name of their facet
+EMPLOYER_FACETS = {
+    "sector": Employer.employer_industry_sector_code,
+    "state": Employer.employer_addr_state,
+    "status": Employer.employer_status,
+    "legalStatus": Employer.employer_legal_status,
+}
+
+
+def employer_facet_key(employer):
+    return (employer.employer_industry_sector_code, employer.employer_addr_state, employer.employer_status,
+            employer.employer_legal_status)
+
+
+class EmployerFacetIndex:
+    """
+    In-process count of employers by combination of their EMPLOYER_FACETS values. There are far fewer combinations
+    than employers, so facet counts under any filter are computed from this table without touching employers. Like
+    the other in-process indexes it follows the employers data version and applies the changes committed by this
+    worker in place.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._counts = Counter()
+
+    def ensure_current(self, version=None):
+        """
+        Reload the counts if the employers data version has moved past the loaded copy.
+
+        :param version: The current employers data version, if already read.
+        """
+        if version is None:
+            version = get_data_version(EMPLOYERS_VERSION)
+        with self._lock:
+            if self._version is None or version > self._version:
+                columns = list(EMPLOYER_FACETS.values())
+                self._counts = Counter({tuple(row[:-1]): row[-1] for row in db.session.execute(
+                    select(*columns, func.count()).group_by(*columns))})
+                self._version = version
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+
+    def apply(self, version, removed=(), added=()):
+        """
+        Apply employer changes committed by this worker without counting every employer again.
+
+        :param version: The employers data version produced by the commit that made the changes.
+        :param removed: employer_facet_key tuples of deleted employers and of changed employers before the change.
+        :param added: employer_facet_key tuples of added employers and of changed employers after the change.
+        """
+        with self._lock:
+            if self._version is None:
+                return
+            if version != self._version + 1:
+                self._version = None
+                return
+            self._counts.subtract(removed)
+            self._counts.update(added)
+            self._counts = +self._counts
+            self._version = version
+
+    def facets(self, filters):
+        """
+        Count the employers by each facet. Every facet is counted under the filters on the other facets, so its
+        counts show what selecting another of its values would return.
+
+        :param filters: Dictionary from facet name to the value employers must have.
+
+        :return: A tuple (number of employers matching every filter, dictionary from facet name to a Counter of
+            employers per value).
+        """
+        names = list(EMPLOYER_FACETS)
+        filter_items = [(names.index(name), value) for name, value in filters.items()]
+        counts = {name: Counter() for name in names}
+        total = 0
+        with self._lock:
+            for key, count in self._counts.items():
+                mismatches = [index for index, value in filter_items if key[index] != value]
+                if not mismatches:
+                    total += count
+                    for index, name in enumerate(names):
+                        counts[name][key[index]] += count
+                elif len(mismatches) == 1:
+                    counts[names[mismatches[0]]][key[mismatches[0]]] += count
+        return total, counts
+
+
+employer_facet_index = EmployerFacetIndex()
+
+
+def assign_employer_component(employer):
+    """
+    Give a newly added employer a component of its own.
+
+    :param employer: The Employer record added to the session.
+    """
+    db.session.flush()
+    employer.employer_component_id = employer.employer_id
+
+
+def merge_employer_components(relations):
+    """
+    Union the components joined by new relations within the current transaction.
+
+    Each merged group is relabelled to its smallest component id. If any employer in a group has no component id
+    yet (the table was never backfilled), the whole group is reset to NULL so that graph requests fall back to a
+    traversal until `flask rebuild-employer-components` is run.
+
+    :param relations: The EmployerRelation records added to the session.
+    """
+    employer_ids = {r.parent_employer_id for r in relations} | {r.child_employer_id for r in relations}
+    components = dict(db.session.execute(
+        select(Employer.employer_id, Employer.employer_component_id).where(Employer.employer_id.in_(employer_ids))
+    ).all())
+
+    groups = UnionFind()
+    for relation in relations:
+        groups.union(('employer', relation.parent_employer_id), ('employer', relation.child_employer_id))
+    for employer_id, component_id in components.items():
+        if component_id is not None:
+            groups.union(('employer', employer_id), ('component', component_id))
+
+    merged_component_ids = {}
+    for employer_id in employer_ids:
+        merged_component_ids.setdefault(groups.find(('employer', employer_id)), set()).add(components.get(employer_id))
+
+    relabelled_ids = {}
+    for component_ids in merged_component_ids.values():
+        known_ids = component_ids - {None}
+        if not known_ids or (len(known_ids) == 1 and None not in component_ids):
+            continue
+        for component_id in known_ids:
+            relabelled_ids[component_id] = None if None in component_ids else min(known_ids)
+
+    # One UPDATE relabels every merged group of the batch
+    if relabelled_ids:
+        db.session.execute(
+            update(Employer)
+            .where(Employer.employer_component_id.in_(relabelled_ids))
+            .values(employer_component_id=case(relabelled_ids, value=Employer.employer_component_id))
+            .execution_options(synchronize_session=False)
+        )
+
+
+class UnionFind:
+    """
+    Disjoint-set forest with path halving and union by size over arbitrary hashable items.
+    """
+
+    def __init__(self):
+        self._parents = {}
+        self._sizes = {}
+
+    def find(self, item):
+        parents = self._parents
+        if item not in parents:
+            parents[item] = item
+            self._sizes[item] = 1
+            return item
+        while parents[item] != item:
+            parents[item] = parents[parents[item]]
+            item = parents[item]
+        return item
+
+    def union(self, a, b):
+        root_a = self.find(a)
+        root_b = self.find(b)
+        if root_a == root_b:
+            return root_a
+        if self._sizes[root_a] < self._sizes[root_b]:
+            root_a, root_b = root_b, root_a
+        self._parents[root_b] = root_a
+        self._sizes[root_a] += self._sizes[root_b]
+        return root_a
+
+
+LAYOUT_NODE_SPACING = 200
+LAYOUT_LAYER_SPACING = 150
+LAYOUT_ORDERING_SWEEPS = 4
+
+
+def layered_graph_layout(node_ids, edges):
+    """
+    Lay out a directed graph in layers (Sugiyama style): every node is placed one layer below its deepest parent
+    (longest path layering), the nodes of each layer are reordered by the barycenter of their neighbours in
+    alternating downward and upward sweeps to reduce edge crossings, and the layers are centered on x = 0.
+
+    :param node_ids: The ids of the nodes to place.
+    :param edges: Tuples of (parent id, child id).
+    :return: Dictionary mapping each node id to its (x, y) position.
+    """
+    node_ids = sorted(node_ids)
+    parents = {node_id: [] for node_id in node_ids}
+    children = {node_id: [] for node_id in node_ids}
+    for parent_id, child_id in edges:
+        if parent_id != child_id and parent_id in children and child_id in parents:
+            children[parent_id].append(child_id)
+            parents[child_id].append(parent_id)
+
+    # Longest path layering in topological order; nodes on a cycle go below the parents placed before them
+    in_degrees = {node_id: len(parents[node_id]) for node_id in node_ids}
+    layers = dict.fromkeys(node_ids, 0)
+    queue = [node_id for node_id in node_ids if not in_degrees[node_id]]
+    placed = set(queue)
+    while queue:
+        node_id = queue.pop()
+        for child_id in children[node_id]:
+            layers[child_id] = max(layers[child_id], layers[node_id] + 1)
+            in_degrees[child_id] -= 1
+            if not in_degrees[child_id]:
+                placed.add(child_id)
+                queue.append(child_id)
+    for node_id in node_ids:
+        if node_id not in placed:
+            layers[node_id] = max((layers[parent_id] + 1 for parent_id in parents[node_id] if parent_id in placed),
+                                  default=0)
+            placed.add(node_id)
+
+    rows = [[] for _ in range(max(layers.values(), default=-1) + 1)]
+    for node_id in node_ids:
+        rows[layers[node_id]].append(node_id)
+    orders = {node_id: index for row in rows for index, node_id in enumerate(row)}
+
+    for sweep in range(LAYOUT_ORDERING_SWEEPS):
+        downward = sweep % 2 == 0
+        neighbours = parents if downward else children
+        for row in (rows[1:] if downward else rows[-2::-1]):
+            barycenters = {node_id: sum(orders[n] for n in neighbours[node_id]) / len(neighbours[node_id])
+                           if neighbours[node_id] else orders[node_id] for node_id in row}
+            row.sort(key=barycenters.__getitem__)
+            for index, node_id in enumerate(row):
+                orders[node_id] = index
+
+    return {node_id: ((orders[node_id] - (len(rows[layers[node_id]]) - 1) / 2) * LAYOUT_NODE_SPACING,
+                      layers[node_id] * LAYOUT_LAYER_SPACING) for node_id in node_ids}
+
+
+class GraphLayoutCache:
+    """
+    Least recently used cache of graph layouts keyed on a digest of the graph's nodes and edges, so a layout is only
+    computed again once the admin routes change the shape of that graph. Edits to the employers themselves leave the
+    key, and so the layout, untouched.
+    """
+
+    def __init__(self, max_entries):
+        self._lock = threading.Lock()
+        self._max_entries = max_entries
+        self._layouts = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(node_ids, edges):
+        digest = hashlib.sha256()
+        digest.update(",".join(map(str, sorted(node_ids))).encode())
+        digest.update(b"|")
+        digest.update(",".join(f"{parent_id}>{child_id}" for parent_id, child_id in sorted(edges)).encode())
+        return digest.digest()
+
+    def layout(self, node_ids, edges):
+        """
+        Return the layout of a graph, computing and caching it when the graph has not been laid out yet.
+
+        :param node_ids: The ids of the nodes of the graph.
+        :param edges: Tuples of (parent id, child id).
+        :return: Dictionary mapping each node id to its (x, y) position.
+        """
+        key = self.key(node_ids, edges)
+        with self._lock:
+            positions = self._layouts.get(key)
+            if positions is not None:
+                self._layouts.move_to_end(key)
+                self.hits += 1
+                return positions
+            self.misses += 1
+
+        positions = layered_graph_layout(node_ids, edges)
+        with self._lock:
+            self._layouts[key] = positions
+            while len(self._layouts) > self._max_entries:
+                self._layouts.popitem(last=False)
+        return positions
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._layouts), "hits": self.hits, "misses": self.misses}
+
+
+graph_layout_cache = GraphLayoutCache(application.config['GRAPH_LAYOUT_CACHE_SIZE'])
+
+
+def graph_payload(employers, relations):
+    """
+    Build the nodes and edges of an employer graph, with every node positioned by the layered layout.
+
+    :param employers: The employers of the graph.
+    :param relations: The relations between them.
+    :return: Dictionary with the graph nodes and edges.
+    """
+    positions = graph_layout_cache.layout([e.employer_id for e in employers],
+                                          [(r.parent_employer_id, r.child_employer_id) for r in relations])
+    return {"nodes": [e.to_graph_node(positions[e.employer_id]) for e in employers],
+            "edges": [r.to_graph_edge() for r in relations]}
+
+
+def relation_type_bit(relation_type):
+    return RELATION_TYPE_BITS.get(relation_type, OTHER_RELATION_BIT)
+
+
+def lineage_paths_through(parent_id, child_id, relation_type, ancestor_paths, descendant_paths):
+    """
+    List the ancestor-to-descendant paths created by a new relation.
+
+    :param parent_id: The parent employer id of the new relation.
+    :param child_id: The child employer id of the new relation.
+    :param relation_type: The relation type of the new relation.
+    :param ancestor_paths: Tuples of (ancestor id, depth, mask) for the paths already leading into the parent.
+    :param descendant_paths: Tuples of (descendant id, depth, mask) for the paths already leading out of the child.
+
+    :return: A set of (ancestor id, descendant id, depth, mask) tuples.
+    """
+    bit = relation_type_bit(relation_type)
+    ancestor_paths = [(parent_id, 0, 0), *ancestor_paths]
+    descendant_paths = [(child_id, 0, 0), *descendant_paths]
+    return {(ancestor_id, descendant_id, ancestor_depth + 1 + descendant_depth,
+             ancestor_mask | bit | descendant_mask)
+            for ancestor_id, ancestor_depth, ancestor_mask in ancestor_paths
+            for descendant_id, descendant_depth, descendant_mask in descendant_paths}
+
+
+def extend_employer_lineage(relations):
+    """
+    Add the lineage paths created by new relations to employer_lineage within the current transaction.
+
+    The recorded paths into the parents and out of the children are read with one query each, the relations are folded
+    into them in memory in order, and the paths not recorded yet are inserted with one executemany, so a batch of
+    relations takes four statements whatever its size.
+
+    :param relations: The EmployerRelation records added to the session.
+    """
+    relation_rows = [(r.parent_employer_id, r.child_employer_id, r.employer_relation_type) for r in relations]
+    if not relation_rows:
+        return
+
+    ancestor_paths = {}
+    for ancestor_id, descendant_id, depth, mask in db.session.execute(
+            select(EmployerLineage.ancestor_employer_id, EmployerLineage.descendant_employer_id,
+                   EmployerLineage.lineage_depth, EmployerLineage.lineage_relation_mask)
+            .where(EmployerLineage.descendant_employer_id.in_({row[0] for row in relation_rows}))):
+        ancestor_paths.setdefault(descendant_id, set()).add((ancestor_id, depth, mask))
+    descendant_paths = {}
+    for ancestor_id, descendant_id, depth, mask in db.session.execute(
+            select(EmployerLineage.ancestor_employer_id, EmployerLineage.descendant_employer_id,
+                   EmployerLineage.lineage_depth, EmployerLineage.lineage_relation_mask)
+            .where(EmployerLineage.ancestor_employer_id.in_({row[1] for row in relation_rows}))):
+        descendant_paths.setdefault(ancestor_id, set()).add((descendant_id, depth, mask))
+
+    paths = {(row["ancestor_employer_id"], row["descendant_employer_id"], row["lineage_depth"],
+              row["lineage_relation_mask"])
+             for row in compute_employer_lineage(relation_rows, ancestor_paths, descendant_paths)}
+
+    # The same path may already be recorded if a relation duplicates an existing one
+    existing_paths = set(db.session.execute(
+        select(EmployerLineage.ancestor_employer_id, EmployerLineage.descendant_employer_id,
+               EmployerLineage.lineage_depth, EmployerLineage.lineage_relation_mask)
+        .where(EmployerLineage.ancestor_employer_id.in_({path[0] for path in paths}),
+               EmployerLineage.descendant_employer_id.in_({path[1] for path in paths}))
+    ).all())
+    new_paths = paths - existing_paths
+    if new_paths:
+        db.session.execute(insert(EmployerLineage), [
+            {"ancestor_employer_id": ancestor_id, "descendant_employer_id": descendant_id,
+             "lineage_depth": depth, "lineage_relation_mask": mask}
+            for ancestor_id, descendant_id, depth, mask in new_paths
+        ])
+
+
+def compute_employer_lineage(relations, ancestor_paths=None, descendant_paths=None):
+    """
+    Compute the employer_lineage rows of a set of relations, from scratch or on top of recorded paths.
+
+    :param relations: Tuples of (parent id, child id, relation type).
+    :param ancestor_paths: Dictionary from employer id to a set of (ancestor id, depth, mask) for the recorded paths
+    into it, covering every parent of the relations. Extended in place.
+    :param descendant_paths: Dictionary from employer id to a set of (descendant id, depth, mask) for the recorded paths
+    out of it, covering every child of the relations. Extended in place.
+
+    :return: List of employer_lineage row dictionaries for the paths through the relations.
+    """
+    ancestor_paths = {} if ancestor_paths is None else ancestor_paths
+    descendant_paths = {} if descendant_paths is None else descendant_paths
+    lineage = set()
+    for parent_id, child_id, relation_type in relations:
+        paths = lineage_paths_through(parent_id, child_id, relation_type,
+                                      ancestor_paths.get(parent_id, ()), descendant_paths.get(child_id, ()))
+        for ancestor_id, descendant_id, depth, mask in paths - lineage:
+            ancestor_paths.setdefault(descendant_id, set()).add((ancestor_id, depth, mask))
+            descendant_paths.setdefault(ancestor_id, set()).add((descendant_id, depth, mask))
+        lineage |= paths
+    return [{"ancestor_employer_id": ancestor_id, "descendant_employer_id": descendant_id,
+             "lineage_depth": depth, "lineage_relation_mask": mask}
+            for ancestor_id, descendant_id, depth, mask in lineage]
+
+
+def stage_employer_relations(relations):
+    """
+    Flush newly added relations, merge the employer components they join, extend the lineage closure and bump the
+    employer_relations data version, all within the current transaction.
+
+    :param relations: The EmployerRelation records added to the session.
+
+    :return: A tuple (version, relation rows) to hand to EmployerRelationIndex.add_relations once committed.
+    """
+    db.session.flush()
+    merge_employer_components(relations)
+    extend_employer_lineage(relations)
+    version = bump_data_version(EMPLOYER_RELATIONS_VERSION)
+    relation_rows = [(r.employer_relation_id, r.parent_employer_id, r.child_employer_id,
+                      r.employer_relation_type, r.employer_relation_start_date) for r in relations]
+    return version, relation_rows
+
+
+def fetch_employer_component(root_employers, as_of=None):
+    """
+    Collect every employer connected to the given employers through employer_relations.
+
+    How the lineage is found depends on the EMPLOYER_GRAPH_STRATEGY setting. Graphs as of a past date are always
+    resolved by the database, so that the temporal conditions are applied in SQL.
+
+    :param root_employers: The Employer records to start the traversal from.
+    :param as_of: Optional date; only employers existing and relations started on that date are followed.
+
+    :return: A tuple (employers, relations) with the employers in traversal order and every relation between them.
+    """
+    strategy = application.config['EMPLOYER_GRAPH_STRATEGY']
+    if as_of is not None:
+        if supports_recursive_cte():
+            return fetch_employer_component_by_cte(root_employers, as_of)
+        return fetch_employer_component_by_frontier(root_employers, as_of)
+    if strategy == 'component':
+        if all(e.employer_component_id is not None for e in root_employers):
+            return fetch_employer_component_by_id(root_employers)
+        return fetch_employer_component_from_index(root_employers)
+    if strategy == 'index':
+        return fetch_employer_component_from_index(root_employers)
+    if strategy == 'recursive_cte' and supports_recursive_cte():
+        return fetch_employer_component_by_cte(root_employers)
+    return fetch_employer_component_by_frontier(root_employers)
+
+
+def fetch_employer_component_by_id(root_employers):
+    """
+    Load every employer sharing a component with the given employers, without any traversal.
+
+    :param root_employers: The Employer records to start from, all of which must have a component id.
+
+    :return: A tuple (employers, relations) with the root employers first and every relation between the employers.
+    """
+    root_ids = {e.employer_id for e in root_employers}
+    component_ids = {e.employer_component_id for e in root_employers}
+
+    employers = Employer.query.filter(
+        Employer.employer_component_id.in_(component_ids)
+    ).order_by(Employer.employer_id).all()
+    employers.sort(key=lambda e: e.employer_id not in root_ids)
+
+    edges = EmployerRelation.query.join(
+        Employer, Employer.employer_id == EmployerRelation.parent_employer_id
+    ).filter(
+        Employer.employer_component_id.in_(component_ids)
+    ).order_by(EmployerRelation.employer_relation_id).all()
+    employer_ids = {e.employer_id for e in employers}
+    edges = [r for r in edges if r.child_employer_id in employer_ids]
+    return employers, edges
+
+
+def supports_recursive_cte():
+    """
+    Check whether the database can evaluate the recursive lineage query.
+
+    :return: True for MySQL 8 (or MariaDB 10.2) and later and for SQLite 3.8.3 and later.
+    """
+    dialect = db.engine.dialect
+    version = dialect.server_version_info or ()
+    if dialect.name in ('mysql', 'mariadb'):
+        return version >= ((10, 2) if getattr(dialect, 'is_mariadb', False) else (8,))
+    if dialect.name == 'sqlite':
+        return version >= (3, 8, 3)
+    return False
+
+
+def fetch_employer_component_by_cte(root_employers, as_of=None):
+    """
+    Collect every employer connected to the given employers with a single recursive query.
 
+    The recursive part follows relations in both directions and UNION discards employers that were already
+    reached, so cycles terminate. On MySQL the depth of the lineage is bounded by cte_max_recursion_depth.
+
+    :param root_employers: The Employer records to start the traversal from.
+    :param as_of: Optional date; only employers existing and relations started on that date are followed.
+
+    :return: A tuple (employers, relations) with the employers in traversal order and every relation between them.
+    """
+    root_ids = {e.employer_id for e in root_employers}
+    lineage = select(Employer.employer_id.label('employer_id')).where(
+        Employer.employer_id.in_(root_ids)
+    ).cte('lineage', recursive=True)
+    steps = []
+    for from_column, to_column in ((EmployerRelation.parent_employer_id, EmployerRelation.child_employer_id),
+                                   (EmployerRelation.child_employer_id, EmployerRelation.parent_employer_id)):
+        step = select(to_column).join(lineage, from_column == lineage.c.employer_id)
+        if as_of is not None:
+            step = step.join(Employer, Employer.employer_id == to_column) \
+                .where(relation_existed_on(as_of), employer_existed_on(as_of))
+        steps.append(step)
+    lineage = lineage.union(*steps)
+
+    employers = db.session.execute(
+        select(Employer).join(lineage, Employer.employer_id == lineage.c.employer_id).order_by(Employer.employer_id)
+    ).scalars().all()
+    employers.sort(key=lambda e: e.employer_id not in root_ids)
+    employer_ids = {e.employer_id for e in employers}
+    # Both ends of a relation belong to the same lineage, so filtering on the parent is enough
+    edges = EmployerRelation.query.filter(EmployerRelation.parent_employer_id.in_(employer_ids))
+    if as_of is not None:
+        edges = edges.filter(relation_existed_on(as_of))
+    edges = edges.order_by(EmployerRelation.employer_relation_id).all()
+    edges = [r for r in edges if r.child_employer_id in employer_ids]
+    return employers, edges
+
+
+def fetch_employer_component_from_index(root_employers):
+    employer_relation_index.ensure_current()
+    employer_ids, relations = employer_relation_index.component([e.employer_id for e in root_employers])
+
+    employers_by_id = {e.employer_id: e for e in root_employers}
+    missing_ids = [employer_id for employer_id in employer_ids if employer_id not in employers_by_id]
+    if missing_ids:
+        for employer in Employer.query.filter(Employer.employer_id.in_(missing_ids)).all():
+            employers_by_id[employer.employer_id] = employer
+
+    employers = [employers_by_id[employer_id] for employer_id in employer_ids if employer_id in employers_by_id]
+    # Relations pointing at employer records that no longer exist are left out of the graph
+    edges = [r for r in relations
+             if r.parent_employer_id in employers_by_id and r.child_employer_id in employers_by_id]
+    return employers, edges
+
+
+def fetch_employer_component_by_frontier(root_employers, as_of=None):
+    """
+    Collect every employer connected to the given employers by querying the database one level at a time.
+
+    The lineage is walked breadth first: each level issues one query for all relations touching the current
+    frontier and one query for the employers those relations newly reach, so the number of round trips grows
+    with the depth of the graph rather than with the number of employers in it.
+
+    :param root_employers: The Employer records to start the traversal from.
+    :param as_of: Optional date; only employers existing and relations started on that date are followed.
+
+    :return: A tuple (employers, relations) with the employers in traversal order and every relation between them.
+    """
+    employers = list(root_employers)
+    employer_ids = {e.employer_id for e in employers}
+    visited_ids = set(employer_ids)
+    relations = {}
+    frontier = set(employer_ids)
+
+    while frontier:
+        level_relations = EmployerRelation.query.filter(
+            (EmployerRelation.parent_employer_id.in_(frontier)) |
+            (EmployerRelation.child_employer_id.in_(frontier))
+        )
+        if as_of is not None:
+            level_relations = level_relations.filter(relation_existed_on(as_of))
+        level_relations = level_relations.all()
+
+        discovered_ids = set()
+        for relation in level_relations:
+            relations[relation.employer_relation_id] = relation
+            for related_id in (relation.parent_employer_id, relation.child_employer_id):
+                if related_id not in visited_ids:
+                    discovered_ids.add(related_id)
+
+        if not discovered_ids:
+            break
+
+        visited_ids.update(discovered_ids)
+        discovered = Employer.query.filter(Employer.employer_id.in_(discovered_ids))
+        if as_of is not None:
+            discovered = discovered.filter(employer_existed_on(as_of))
+        discovered = discovered.all()
+        discovered.sort(key=lambda e: e.employer_id)
+        employers.extend(discovered)
+        frontier = {e.employer_id for e in discovered}
+        employer_ids.update(frontier)
+
+    # Relations pointing at employer records that no longer exist are left out of the graph
+    edges = [r for r in relations.values()
+             if r.parent_employer_id in employer_ids and r.child_employer_id in employer_ids]
+    edges.sort(key=lambda r: r.employer_relation_id)
+    return employers, edges
+
+
+def employer_row_serializer(fields, column_names):
+    """
+    Build a function turning rows of employer columns into front end payloads. Column positions are resolved once
+    here, so each row is read by index, without ORM objects or attribute lookups.
+
+    :param fields: The payload fields to include.
+    :param column_names: The employer column names in the order the rows hold them.
+
+    :return: A function from a row to a dictionary shaped like Employer.to_front_end with only the requested fields.
+    """
+    positions = {name: position for position, name in enumerate(column_names)}
+    plain_fields = [(field, positions[EMPLOYER_FRONT_END_FIELDS[field]]) for field in fields
+                    if field != "address" and field not in EMPLOYER_FRONT_END_DATE_FIELDS]
+    date_fields = [(field, positions[EMPLOYER_FRONT_END_FIELDS[field]]) for field in fields
+                   if field in EMPLOYER_FRONT_END_DATE_FIELDS]
+    address_fields = [(key, positions[column]) for key, column in EMPLOYER_FRONT_END_ADDRESS_FIELDS.items()] \
+        if "address" in fields else None
+
+    def serialize(row):
+        payload = {field: row[position] for field, position in plain_fields}
+        for field, position in date_fields:
+            value = row[position]
+            payload[field] = value.isoformat() if value is not None else None
+        if address_fields is not None:
+            payload["address"] = {key: row[position] for key, position in address_fields}
+        return payload
+
+    return serialize
+
+
+def serialize_employer_rows(query, fields):
+    """
+    Run an employer list query and build the payload of every row, the way EMPLOYER_SERIALIZATION selects.
+
+    :param query: A select of employer columns, as built by parse_employer_list_args.
+    :param fields: The payload fields to include.
+
+    :return: A tuple (list of rows as returned by the query, list of payloads).
+    """
+    if application.config['EMPLOYER_SERIALIZATION'] == 'orm':
+        employers = db.session.execute(query.with_only_columns(Employer)).scalars().all()
+        payloads = []
+        for employer in employers:
+            payload = employer.to_front_end()
+            payloads.append({field: payload[field] for field in fields})
+        return employers, payloads
+
+    rows = db.session.execute(query).all()
+    serialize = employer_row_serializer(fields, [column.key for column in query.selected_columns])
+    return rows, [serialize(row) for row in rows]
+
+
+def parse_int_arg(args, name):
+    """
+    Read an integer query string argument.
+
+    :raises ValueError: If the argument is present but not an integer.
+
+    :return: The integer value, or None if the argument is missing.
+    """
+    value = args.get(name)
+    if value is None or value == "":
+        return None
     try:
-        # Send the POST request with the form data
-        if not environ.get("GMAIL_API_URL"):
-            raise InternalServerError("Internal server error")
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name.replace('_', ' ')}")
 
-        response = requests.post(environ.get("GMAIL_API_URL"), data=data)
 
-        # Check the response status code for errors and raise EmailSendingError if necessary
-        if response.status_code != 200:
-            raise EmailSendingError("Failed to send email")
+def parse_date_arg(args, name):
+    """
+    Read a "YYYY-MM-DD" query string argument.
 
-    except requests.exceptions.RequestException as e:
-        raise EmailSendingError("Something went wrong sending the email")
+    :raises ValueError: If the argument is present but not a valid date.
+
+    :return: The date, or None if the argument is missing.
+    """
+    if not args.get(name):
+        return None
+    if not validate_date(args[name]):
+        raise ValueError(f"Invalid {name.replace('_', ' ')} date")
+    return parse_date(args[name])
+
+
+def parse_employer_list_args(args):
+    """
+    Parse the projection and filter arguments of the employer list route into a query.
+
+    :param args: The request's query string arguments.
+
+    :raises ValueError: If an argument has an invalid value.
+
+    :return: A tuple (select statement ordered by employer id, requested payload fields).
+    """
+    fields = ["id", "name", "address", *list(EMPLOYER_FRONT_END_FIELDS)[2:]]
+    if args.get("fields"):
+        fields = [field.strip() for field in args["fields"].split(",") if field.strip()]
+        for field in fields:
+            if field != "address" and field not in EMPLOYER_FRONT_END_FIELDS:
+                raise ValueError(f"Invalid field: {field}")
+
+    column_names = {"employer_id"}
+    for field in fields:
+        if field == "address":
+            column_names.update(EMPLOYER_FRONT_END_ADDRESS_FIELDS.values())
+        else:
+            column_names.add(EMPLOYER_FRONT_END_FIELDS[field])
+    query = select(*[getattr(Employer, name) for name in sorted(column_names)])
+
+    if args.get("state"):
+        query = query.where(Employer.employer_addr_state == args["state"])
+    if args.get("city"):
+        query = query.where(Employer.employer_addr_city == args["city"])
+    if args.get("status"):
+        query = query.where(Employer.employer_status == args["status"])
+    industry_sector_code = parse_int_arg(args, "industry_sector_code")
+    if industry_sector_code is not None:
+        query = query.where(Employer.employer_industry_sector_code == industry_sector_code)
+    founded_after = parse_date_arg(args, "founded_after")
+    if founded_after:
+        query = query.where(Employer.employer_founded_date >= founded_after)
+    founded_before = parse_date_arg(args, "founded_before")
+    if founded_before:
+        query = query.where(Employer.employer_founded_date <= founded_before)
+    as_of = parse_date_arg(args, "as_of")
+    if as_of:
+        query = query.where(employer_existed_on(as_of))
+
+    return query.order_by(Employer.employer_id), fields
 
 
 @application.route('/employers', methods=['GET'])
+@query_budget(4)
+@use_read_replica()
 @jwt_required()
 def get_all_employers():
-    # Execute the SQL query
-    employers = Employer.query.all()
+    return versioned_response("employers", request.args, [EMPLOYERS_VERSION], [EMPLOYERS_VERSION],
+                              lambda: (list_employers(), ["employers"]))
+
+
+def list_employers():
+    try:
+        query, fields = parse_employer_list_args(request.args)
+
+        # Opt in to the unpaginated list of every matching employer
+        if request.args.get("all") == "true":
+            _, results = serialize_employer_rows(query, fields)
+            return success_response(f"{len(results)} employers fetched", 200, results)
+
+        limit = parse_int_arg(request.args, "limit")
+        if limit is None:
+            limit = EMPLOYER_PAGE_SIZE
+        if not 0 < limit <= MAX_EMPLOYER_PAGE_SIZE:
+            raise ValueError("Invalid limit")
+        after = parse_int_arg(request.args, "after")
+        if after is not None:
+            query = query.where(Employer.employer_id > after)
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    # Fetch one extra row to find out whether another page follows
+    rows, results = serialize_employer_rows(query.limit(limit + 1), fields)
+    next_cursor = str(rows[limit - 1].employer_id) if len(rows) > limit else None
+    results = results[:limit]
+    return success_response(f"{len(results)} employers fetched", 200, {
+        "employers": results,
+        "nextCursor": next_cursor
+    })
+
+
+@application.route('/employers/facets', methods=['GET'])
+@query_budget(4)
+@use_read_replica()
+@jwt_required()
+def get_employer_facets():
+    filters = {}
+    try:
+        sector_code = parse_int_arg(request.args, "industry_sector_code")
+        if sector_code is not None:
+            filters["sector"] = sector_code
+    except ValueError as e:
+        return error_response(str(e), 400)
+    for name, arg in (("state", "state"), ("status", "status"), ("legalStatus", "legal_status")):
+        if request.args.get(arg):
+            filters[name] = request.args[arg]
+
+    try:
+        versions = get_data_versions([EMPLOYERS_VERSION, NAICS_CODES_VERSION])
+        sectors = naics_sector_map.ensure_current(versions[NAICS_CODES_VERSION])
+        employer_facet_index.ensure_current(versions[EMPLOYERS_VERSION])
+        total, facet_counts = employer_facet_index.facets(filters)
+
+        facets = {}
+        for name, counts in facet_counts.items():
+            values = sorted(counts.items(), key=lambda item: (-item[1], str(item[0])))
+            facets[name] = [{"value": value, "count": count} for value, count in values]
+        for sector in facets["sector"]:
+            sector["label"] = sectors.get(sector["value"])
+        return success_response("Employer facets fetched", 200, {"total": total, "facets": facets})
+    except Exception as e:
+        return error_response("Internal server error", 500)
+
+
+@application.route('/naics-codes', methods=['GET'])
+@query_budget(2)
+@use_read_replica()
+@jwt_required()
+def get_naics_codes():
+    try:
+        sectors = naics_sector_map.ensure_current()
+        return success_response(f"{len(sectors)} NAICS sectors fetched", 200, [
+            {"code": code, "definition": definition} for code, definition in sorted(sectors.items())
+        ])
+    except Exception as e:
+        return error_response("Internal server error", 500)
+
+
+MAX_NAME_SEARCH_LIMIT = 100
+
+
+@application.route('/employers/search', methods=['GET'])
+@query_budget(4)
+@use_read_replica()
+@jwt_required()
+def search_employers():
+    query = request.args.get("q", "").strip()
+    if not query:
+        return error_response("Search query is required", 400)
+    try:
+        limit = parse_int_arg(request.args, "limit")
+        limit = 20 if limit is None else limit
+        if not 0 < limit <= MAX_NAME_SEARCH_LIMIT:
+            raise ValueError("Invalid limit")
+    except ValueError as e:
+        return error_response(str(e), 400)
 
-    # # Convert results to list of dictionaries
-    results = [e.to_front_end() for e in employers]
-    return success_response(f"{len(results)} employers fetched", 200, results)
+    try:
+        employer_name_index.ensure_current()
+        matches = employer_name_index.search(query, limit)
+        return success_response(f"{len(matches)} employers found", 200, [
+            {"id": str(employer_id), "name": name, "match": match_type, "score": round(similarity, 3)}
+            for employer_id, name, match_type, similarity in matches
+        ])
+    except Exception as e:
+        return error_response("Internal server error", 500)
 
 
 @application.route('/verify', methods=['GET'])
+@query_budget(4)
 @jwt_required(locations=['query_string'])
 def verify_user_account():
     try:
@@ -268,6 +2496,7 @@ def verify_user_account():
 
 
 @application.route('/register', methods=['POST'])
+@query_budget(6)
 def register_user():
     try:
         data = request.json
@@ -289,12 +2518,13 @@ def register_user():
             # CASE 1: Record with matching email exists and user is not verified (i.e., access_permissions is Null)
             if existing_user.access_permissions is None:
                 # Resend verification email with updated token
-                send_verification_email(email, user_first_name)
+                queue_verification_email(email, user_first_name)
 
                 # TODO: Update all timestamping functionality to use UTC time
                 existing_user.pending_registr_expiry_datetime = datetime.now() + timedelta(days=3)
 
                 db.session.commit()
+                email_dispatcher.wake()
 
                 return success_response("Verification email resent!", 200)
                 # return jsonify({"message": "Verification email resent!"}), 200
@@ -313,9 +2543,10 @@ def register_user():
         user.access_permissions = None
 
         db.session.add(user)
-        # only commit changes to the users table if the email is sent successfully
-        send_verification_email(email, user_first_name)
+        # the user and the verification email are committed together
+        queue_verification_email(email, user_first_name)
         db.session.commit()
+        email_dispatcher.wake()
 
         return success_response("Verification email sent!", 200)
 
@@ -323,13 +2554,12 @@ def register_user():
         return error_response("Invalid email", 400)
     except RuntimeError:
         return error_response("Invalid request format", 400)
-    except EmailSendingError as e:
-        return error_response(str(e), 500)
     except InternalServerError as e:
         return error_response(str(e), 500)
 
 
 @application.route('/login', methods=['POST'])
+@query_budget(4)
 def login_user():
     try:
         # Get data from the JSON request
@@ -365,135 +2595,626 @@ def login_user():
         return error_response("Invalid request form", 400)
 
 
-@application.route('/employer/name-change', methods=['POST'])
+@application.route('/employer/name-change', methods=['POST'])
+@query_budget(20)
+@admin_required()
+def employer_name_change():
+    try:
+        # Parse the input data
+        data = request.json
+        old_employer_id = data.get("old_employer_id")
+        new_employer_name = data.get("new_employer_name")
+        effective_date = data.get("name_change_effective_date")
+
+        if not all([old_employer_id, new_employer_name, effective_date]):
+            return error_response("Missing required fields", 400)
+
+        if not validate_date(effective_date):
+            return error_response("Invalid name change effective date", 400)
+
+        # Locate and update employer record with old name
+        old_employer = Employer.query.filter_by(employer_id=old_employer_id).first()
+        if not old_employer:
+            return error_response("Employer record with specified name not found", 404)
+
+        old_facet_key = employer_facet_key(old_employer)
+        old_employer.employer_status = "Rebranded"
+
+        # Create employer record for post-rebrand employer
+        new_employer = Employer(
+            employer_name=new_employer_name,
+            employer_addr_line_1=old_employer.employer_addr_line_1,
+            employer_addr_line_2=old_employer.employer_addr_line_2,
+            employer_addr_city=old_employer.employer_addr_city,
+            employer_addr_state=old_employer.employer_addr_state,
+            employer_addr_zip_code=old_employer.employer_addr_zip_code,
+            employer_founded_date=old_employer.employer_founded_date,
+            employer_dissolved_date=old_employer.employer_dissolved_date,
+            employer_bankruptcy_date=old_employer.employer_bankruptcy_date,
+            employer_industry_sector_code=old_employer.employer_industry_sector_code,
+            employer_status="Active",
+            employer_legal_status=old_employer.employer_legal_status
+        )
+
+        db.session.add(new_employer)
+        assign_employer_component(new_employer)
+
+        # Create new employer_relation record
+        new_relation = EmployerRelation(
+            parent_employer_id=old_employer.employer_id,
+            child_employer_id=new_employer.employer_id,
+            employer_relation_type="Rebranding",
+            employer_relation_start_date=parse_date(effective_date)
+        )
+
+        db.session.add(new_relation)
+        staged_relations = stage_employer_relations([new_relation])
+        employers_version = bump_data_version(EMPLOYERS_VERSION)
+        db.session.commit()
+        employer_relation_index.add_relations(*staged_relations)
+        employer_name_index.apply(employers_version, [(new_employer.employer_id, new_employer.employer_name)])
+        employer_facet_index.apply(employers_version, [old_facet_key],
+                                   [employer_facet_key(old_employer), employer_facet_key(new_employer)])
+        invalidate_employer_caches([old_employer_id, new_employer.employer_id])
+
+        return success_response("Employer name change processed", 201, {"newEmployer": new_employer.to_front_end()})
+
+    except Exception as e:
+        return error_response(str(e), 500)
+
+
+@application.route('/employers-graph', methods=['GET'])
+@query_budget(10)
+@use_read_replica()
+@jwt_required()
+def get_employer_graph_by_query():
+    return employer_graph_response(request.args.get("employer_id", None), request.args.get("as_of", None))
+
+
+@application.route('/employers-graph', methods=['POST'])
+@query_budget(10)
+@use_read_replica()
+@jwt_required()
+def get_employer_graph():
+    data = request.json
+    return employer_graph_response(data.get("employer_id", None), data.get("as_of", None))
+
+
+def employer_graph_response(employer_id, as_of=None):
+    if not employer_id:
+        return error_response("Invalid employer id", 400)
+    if as_of and not validate_date(as_of):
+        return error_response("Invalid as of date", 400)
+
+    def build_graph_response():
+        employer = Employer.query.filter_by(employer_id=employer_id).first()
+        if not employer:
+            return error_response("Employer not found", 404), []
+
+        as_of_date = parse_date(as_of)
+        if as_of_date and not Employer.query.filter(Employer.employer_id == employer_id,
+                                                     employer_existed_on(as_of_date)).first():
+            return error_response("Employer did not exist on the given date", 404), []
+
+        employers, relations = fetch_employer_component([employer], as_of_date)
+        response = success_response("Employer graph fetched successfully", 200, graph_payload(employers, relations))
+        return response, [f"employer:{e.employer_id}" for e in employers]
+
+    try:
+        # Graphs include employer rows, so the ETag follows both tables while the cache is keyed on the relations
+        # and relies on tags for changes to individual employers
+        return versioned_response("employers-graph", {"employer_id": employer_id, "as_of": as_of or ""},
+                                  [EMPLOYERS_VERSION, EMPLOYER_RELATIONS_VERSION], [EMPLOYER_RELATIONS_VERSION],
+                                  build_graph_response)
+    except Exception as e:
+        return error_response("Internal server error", 500)
+
+
+MAX_BATCH_GRAPH_ROOTS = 100
+
+
+@application.route('/employers-graph/batch', methods=['POST'])
+@query_budget(10)
+@use_read_replica()
+@jwt_required()
+def get_employer_graphs():
+    data = request.json
+    employer_ids = data.get("employer_ids", None)
+    as_of = data.get("as_of", None)
+
+    if not isinstance(employer_ids, list) or not employer_ids or len(employer_ids) > MAX_BATCH_GRAPH_ROOTS:
+        return error_response("Invalid employer ids", 400)
+    try:
+        employer_ids = sorted({int(employer_id) for employer_id in employer_ids})
+    except (TypeError, ValueError):
+        return error_response("Invalid employer ids", 400)
+    if as_of and not validate_date(as_of):
+        return error_response("Invalid as of date", 400)
+
+    def build_graphs_response():
+        as_of_date = parse_date(as_of)
+        roots = Employer.query.filter(Employer.employer_id.in_(employer_ids))
+        if as_of_date:
+            roots = roots.filter(employer_existed_on(as_of_date))
+        roots = roots.order_by(Employer.employer_id).all()
+
+        # One traversal covers every root, then the result is split into its connected components
+        employers, relations = fetch_employer_component(roots, as_of_date) if roots else ([], [])
+        components = UnionFind()
+        for employer in employers:
+            components.find(employer.employer_id)
+        for relation in relations:
+            components.union(relation.parent_employer_id, relation.child_employer_id)
+
+        graph_indexes = {}
+        for root in roots:
+            graph_indexes.setdefault(components.find(root.employer_id), len(graph_indexes))
+        graph_employers = [[] for _ in graph_indexes]
+        graph_relations = [[] for _ in graph_indexes]
+        for employer in employers:
+            graph_employers[graph_indexes[components.find(employer.employer_id)]].append(employer)
+        for relation in relations:
+            graph_relations[graph_indexes[components.find(relation.parent_employer_id)]].append(relation)
+        graphs = [graph_payload(*graph) for graph in zip(graph_employers, graph_relations)]
+
+        found_ids = {root.employer_id for root in roots}
+        response = success_response(f"{len(graphs)} employer graphs fetched", 200, {
+            "graphs": graphs,
+            "roots": {str(root.employer_id): graph_indexes[components.find(root.employer_id)] for root in roots},
+            "notFound": [str(employer_id) for employer_id in employer_ids if employer_id not in found_ids]
+        })
+        return response, [f"employer:{e.employer_id}" for e in employers]
+
+    try:
+        return versioned_response("employers-graph-batch",
+                                  {"employer_ids": ",".join(map(str, employer_ids)), "as_of": as_of or ""},
+                                  [EMPLOYERS_VERSION, EMPLOYER_RELATIONS_VERSION], [EMPLOYER_RELATIONS_VERSION],
+                                  build_graphs_response)
+    except Exception as e:
+        return error_response("Internal server error", 500)
+
+
+def parse_lineage_filters(args):
+    """
+    Parse the depth and relation type filters shared by the lineage routes.
+
+    :param args: The request's query string arguments.
+
+    :raises ValueError: If a filter has an invalid value.
+
+    :return: A tuple (max depth or None, mask of excluded relation types).
+    """
+    max_depth = parse_int_arg(args, "max_depth")
+    if max_depth is not None:
+        if max_depth < 1:
+            raise ValueError("Invalid max depth")
+
+    excluded_mask = 0
+    relation_types = args.get("relation_types")
+    if relation_types:
+        allowed_mask = 0
+        for relation_type in relation_types.split(","):
+            if relation_type.strip() not in RELATION_TYPE_BITS:
+                raise ValueError(f"Invalid relation type: {relation_type.strip()}")
+            allowed_mask |= RELATION_TYPE_BITS[relation_type.strip()]
+        excluded_mask = ALL_RELATION_BITS & ~allowed_mask
+
+    return max_depth, excluded_mask
+
+
+def fetch_employer_lineage(employer_id, direction, max_depth, excluded_mask):
+    """
+    Load the ancestors or descendants of an employer from employer_lineage.
+
+    :param employer_id: The employer whose lineage is requested.
+    :param direction: "ancestors" or "descendants".
+    :param max_depth: The maximum number of relations between the employer and a result, or None for no limit.
+    :param excluded_mask: Relation type bits that may not appear on the path to a result.
+
+    :return: A list of employer payloads with the depth of the shortest matching path, nearest first.
+    """
+    if direction == "ancestors":
+        anchor_column, result_column = EmployerLineage.descendant_employer_id, EmployerLineage.ancestor_employer_id
+    else:
+        anchor_column, result_column = EmployerLineage.ancestor_employer_id, EmployerLineage.descendant_employer_id
+
+    paths = select(result_column.label("employer_id"), func.min(EmployerLineage.lineage_depth).label("depth")) \
+        .where(anchor_column == employer_id)
+    if max_depth is not None:
+        paths = paths.where(EmployerLineage.lineage_depth <= max_depth)
+    if excluded_mask:
+        paths = paths.where(EmployerLineage.lineage_relation_mask.op("&")(excluded_mask) == 0)
+    paths = paths.group_by(result_column).subquery()
+
+    rows = db.session.execute(
+        select(Employer, paths.c.depth)
+        .join(paths, Employer.employer_id == paths.c.employer_id)
+        .order_by(paths.c.depth, Employer.employer_id)
+    ).all()
+    return [{**employer.to_front_end(), "depth": depth} for employer, depth in rows]
+
+
+def get_employer_lineage(direction):
+    employer_id = request.args.get("employer_id")
+    if not employer_id:
+        return error_response("Invalid employer id", 400)
+
+    try:
+        max_depth, excluded_mask = parse_lineage_filters(request.args)
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    try:
+        if not Employer.query.get(employer_id):
+            return error_response("Employer not found", 404)
+
+        results = fetch_employer_lineage(employer_id, direction, max_depth, excluded_mask)
+        return success_response(f"{len(results)} {direction} fetched", 200, results)
+    except Exception as e:
+        return error_response("Internal server error", 500)
+
+
+@application.route('/employer/ancestors', methods=['GET'])
+@query_budget(4)
+@use_read_replica()
+@jwt_required()
+def get_employer_ancestors():
+    return get_employer_lineage("ancestors")
+
+
+@application.route('/employer/descendants', methods=['GET'])
+@query_budget(4)
+@use_read_replica()
+@jwt_required()
+def get_employer_descendants():
+    return get_employer_lineage("descendants")
+
+
+# Relations after which the child employer carries on the parent's business
+SUCCESSOR_RELATION_MASK = RELATION_TYPE_BITS["Rebranding"] | RELATION_TYPE_BITS["Merger"]
+EMPLOYEE_PAGE_SIZE = 50
+MAX_EMPLOYEE_PAGE_SIZE = 200
+
+
+def fetch_employment_timelines(employee_ids):
+    """
+    Load the employment timelines of several employees with two queries: one for the employments joined to their
+    employers, and one for the successors of all those employers through rebrandings and mergers, read from
+    employer_lineage.
+
+    :param employee_ids: The ids of the employees.
+
+    :return: Dictionary mapping each employee id to its employments, oldest first. Each employment lists the
+        successors of its employer, nearest first, and the current employer: the furthest successor, or the
+        employer itself when it has none.
+    """
+    rows = db.session.execute(
+        select(Employment, Employer)
+        .outerjoin(Employer, Employer.employer_id == Employment.employer_id)
+        .where(Employment.employee_id.in_(employee_ids))
+        .order_by(Employment.employee_id, Employment.start_date, Employment.employment_id)
+    ).all()
+
+    successors = {}
+    employer_ids = {employer.employer_id for _, employer in rows if employer is not None}
+    if employer_ids:
+        paths = select(
+            EmployerLineage.ancestor_employer_id.label("ancestor_id"),
+            EmployerLineage.descendant_employer_id.label("employer_id"),
+            func.min(EmployerLineage.lineage_depth).label("depth")
+        ).where(
+            EmployerLineage.ancestor_employer_id.in_(employer_ids),
+            EmployerLineage.lineage_relation_mask.op("&")(ALL_RELATION_BITS & ~SUCCESSOR_RELATION_MASK) == 0
+        ).group_by(EmployerLineage.ancestor_employer_id, EmployerLineage.descendant_employer_id).subquery()
+
+        for ancestor_id, employer, depth in db.session.execute(
+            select(paths.c.ancestor_id, Employer, paths.c.depth)
+            .join(Employer, Employer.employer_id == paths.c.employer_id)
+            .order_by(paths.c.ancestor_id, paths.c.depth, Employer.employer_id)
+        ):
+            successors.setdefault(ancestor_id, []).append({**employer.to_front_end(), "depth": depth})
+
+    timelines = {employee_id: [] for employee_id in employee_ids}
+    for employment, employer in rows:
+        employer_payload = employer.to_front_end() if employer is not None else None
+        employer_successors = successors.get(employment.employer_id, [])
+        timelines[employment.employee_id].append({
+            **employment.to_front_end(),
+            "employer": employer_payload,
+            "successors": employer_successors,
+            "currentEmployer": employer_successors[-1] if employer_successors else employer_payload
+        })
+    return timelines
+
+
+@application.route('/employee/timeline', methods=['GET'])
+@query_budget(4)
+@use_read_replica()
+@jwt_required()
+def get_employee_timeline():
+    try:
+        employee_id = parse_int_arg(request.args, "employee_id")
+        if not employee_id:
+            raise ValueError("Invalid employee id")
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    try:
+        employee = Employee.query.get(employee_id)
+        if not employee:
+            return error_response("Employee not found", 404)
+
+        employments = fetch_employment_timelines([employee_id])[employee_id]
+        return success_response(f"{len(employments)} employments fetched", 200, {
+            **employee.to_front_end(),
+            "employments": employments
+        })
+    except Exception as e:
+        return error_response("Internal server error", 500)
+
+
+@application.route('/employees/timelines', methods=['GET'])
+@query_budget(4)
+@use_read_replica()
+@jwt_required()
+def get_employee_timelines():
+    query = select(Employee).order_by(Employee.employee_id)
+    try:
+        employee_ids = request.args.get("employee_ids")
+        if employee_ids:
+            try:
+                query = query.where(Employee.employee_id.in_([int(e) for e in employee_ids.split(",")]))
+            except ValueError:
+                raise ValueError("Invalid employee ids")
+        limit = parse_int_arg(request.args, "limit")
+        if limit is None:
+            limit = EMPLOYEE_PAGE_SIZE
+        if not 0 < limit <= MAX_EMPLOYEE_PAGE_SIZE:
+            raise ValueError("Invalid limit")
+        after = parse_int_arg(request.args, "after")
+        if after is not None:
+            query = query.where(Employee.employee_id > after)
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    try:
+        # Fetch one extra row to find out whether another page follows
+        employees = db.session.execute(query.limit(limit + 1)).scalars().all()
+        next_cursor = str(employees[limit - 1].employee_id) if len(employees) > limit else None
+        employees = employees[:limit]
+        timelines = fetch_employment_timelines([employee.employee_id for employee in employees]) if employees else {}
+        return success_response(f"{len(employees)} employee timelines fetched", 200, {
+            "employees": [{**employee.to_front_end(), "employments": timelines[employee.employee_id]}
+                          for employee in employees],
+            "nextCursor": next_cursor
+        })
+    except Exception as e:
+        return error_response("Internal server error", 500)
+
+
+@application.route('/employment', methods=['POST'])
+@query_budget(10)
 @admin_required()
-def employer_name_change():
+def create_employment():
     try:
-        # Parse the input data
         data = request.json
-        old_employer_id = data.get("old_employer_id")
-        new_employer_name = data.get("new_employer_name")
-        effective_date = data.get("name_change_effective_date")
+        employee_id = data.get("employee_id")
+        employer_id = data.get("employer_id")
+        job_title = data.get("job_title")
+        start_date = data.get("start_date")
+        end_date = data.get("end_date")
 
-        if not all([old_employer_id, new_employer_name, effective_date]):
+        if not all([employee_id, employer_id, job_title, start_date]):
             return error_response("Missing required fields", 400)
+        if not validate_date(start_date):
+            return error_response("Invalid start date", 400)
+        if end_date and (not validate_date(end_date) or parse_date(end_date) < parse_date(start_date)):
+            return error_response("Invalid end date", 400)
+
+        if not Employee.query.get(employee_id):
+            return error_response("Employee not found", 404)
+        if not Employer.query.get(employer_id):
+            return error_response("Employer not found", 404)
 
-        # Locate and update employer record with old name
-        old_employer = Employer.query.filter_by(employer_id=old_employer_id).first()
-        if not old_employer:
-            return error_response("Employer record with specified name not found", 404)
-
-        old_employer.employer_status = "Rebranded"
-
-        # Create employer record for post-rebrand employer
-        new_employer = Employer(
-            employer_name=new_employer_name,
-            employer_addr_line_1=old_employer.employer_addr_line_1,
-            employer_addr_line_2=old_employer.employer_addr_line_2,
-            employer_addr_city=old_employer.employer_addr_city,
-            employer_addr_state=old_employer.employer_addr_state,
-            employer_addr_zip_code=old_employer.employer_addr_zip_code,
-            employer_founded_date=old_employer.employer_founded_date,
-            employer_dissolved_date=old_employer.employer_dissolved_date,
-            employer_bankruptcy_date=old_employer.employer_bankruptcy_date,
-            employer_industry_sector_code=old_employer.employer_industry_sector_code,
-            employer_status="Active",
-            employer_legal_status=old_employer.employer_legal_status
+        employment = Employment(
+            employee_id=employee_id,
+            employer_id=employer_id,
+            job_title=job_title,
+            start_date=parse_date(start_date),
+            end_date=parse_date(end_date)
         )
-
-        db.session.add(new_employer)
+        db.session.add(employment)
         db.session.flush()
+        apply_employment_rollup_changes(employment.employer_id,
+                                        employment_rollup_changes(employment.start_date, employment.end_date))
+        db.session.commit()
 
-        # Create new employer_relation record
-        new_relation = EmployerRelation(
-            parent_employer_id=old_employer.employer_id,
-            child_employer_id=new_employer.employer_id,
-            employer_relation_type="Rebranding",
-            employer_relation_start_date=effective_date
-        )
+        return success_response("New employment added", 201, employment.to_front_end())
+    except Exception as e:
+        return error_response(str(e), 500)
 
-        db.session.add(new_relation)
-        db.session.commit()
 
-        return success_response("Employer name change processed", 201, {"newEmployer": new_employer.to_front_end()})
+@application.route('/employment/close', methods=['POST'])
+@query_budget(8)
+@admin_required()
+def close_employment():
+    try:
+        data = request.json
+        employment_id = data.get("employment_id")
+        end_date = data.get("end_date")
+
+        if not all([employment_id, end_date]):
+            return error_response("Missing required fields", 400)
+        if not validate_date(end_date):
+            return error_response("Invalid end date", 400)
+
+        employment = Employment.query.get(employment_id)
+        if not employment:
+            return error_response("Employment not found", 404)
+        if employment.end_date is not None:
+            return error_response("Employment is already closed", 400)
+        if employment.start_date and parse_date(end_date) < employment.start_date:
+            return error_response("Invalid end date", 400)
+
+        employment.end_date = parse_date(end_date)
+        apply_employment_rollup_changes(employment.employer_id,
+                                        employment_rollup_changes(employment.start_date, None, -1),
+                                        employment_rollup_changes(employment.start_date, employment.end_date))
+        db.session.commit()
 
+        return success_response("Employment closed", 200, employment.to_front_end())
     except Exception as e:
         return error_response(str(e), 500)
 
 
-@application.route('/employers-graph', methods=['POST'])
-@jwt_required()
-def get_employer_graph():
-    data = request.json
-    employer_id = data.get("employer_id", None)
+MAX_ROLLUP_MONTHS = 1200
 
-    if not employer_id:
-        return error_response("Invalid employer id", 400)
 
+def parse_month_arg(args, name):
+    """
+    Read a "YYYY-MM" query string argument.
+
+    :raises ValueError: If the argument is present but not a valid month.
+
+    :return: The first day of the month, or None if the argument is missing.
+    """
+    if not args.get(name):
+        return None
     try:
-        employer = Employer.query.filter_by(employer_id=employer_id).first()
-        if employer:
-            employers = []
-            employer_ids = set()
-            mapping = set()
-
-            def add_employer(employer):
-                if employer.employer_id not in employer_ids:
-                    employer_ids.add(employer.employer_id)
-                    employers.append({
-                        "id": str(employer.employer_id),
-                        "name": employer.employer_name,
-                        "estDate": employer.employer_founded_date,
-                        "position": {"x": 0, "y": 0}
-                    })
-
-            def find_parents(child_employer):
-                parent_relations = EmployerRelation.query.filter_by(child_employer_id=child_employer.employer_id).all()
-                for parent_relation in parent_relations:
-                    parent_employer = Employer.query.get(parent_relation.parent_employer_id)
-                    if parent_employer.employer_id not in employer_ids:
-                        add_employer(parent_employer)
-                        mapping.add((parent_relation.employer_relation_id, parent_employer.employer_id,
-                                     child_employer.employer_id,
-                                     parent_relation.employer_relation_type,
-                                     parent_relation.employer_relation_start_date))
-                        find_parents(parent_employer)
-                        find_children(parent_employer)
-
-            def find_children(parent_employer):
-                child_relations = EmployerRelation.query.filter_by(parent_employer_id=parent_employer.employer_id).all()
-                for child_relation in child_relations:
-                    child_employer = Employer.query.get(child_relation.child_employer_id)
-                    if child_employer.employer_id not in employer_ids:
-                        add_employer(child_employer)
-                        mapping.add((child_relation.employer_relation_id, parent_employer.employer_id,
-                                     child_employer.employer_id,
-                                     child_relation.employer_relation_type,
-                                     child_relation.employer_relation_start_date))
-                        find_children(child_employer)
-                        find_parents(child_employer)
-
-            add_employer(employer)
-            find_parents(employer)
-            find_children(employer)
-
-            mapping_list = [
-                {"id": str(relation_id), "source": str(parent), "target": str(child), "relationType": relation_type,
-                 "startDate": relation_start_date} for
-                relation_id, parent, child, relation_type, relation_start_date in mapping
-            ]
-
-            return success_response("Employer graph fetched successfully", 200, {
-                "nodes": employers,
-                "edges": mapping_list
+        return datetime.strptime(args[name], '%Y-%m').date()
+    except ValueError:
+        raise ValueError(f"Invalid {name.replace('_', ' ')} month")
+
+
+def fetch_workforce_series(employer_condition, first_month, last_month):
+    """
+    Build the monthly workforce statistics of a set of employers from their rollup buckets alone.
+
+    :param employer_condition: SQL condition on EmploymentRollup.employer_id selecting the employers.
+    :param first_month: The first month to report, or None to start with the first month with any change.
+    :param last_month: The last month to report, or None to end with the current month (or the last month with any
+        change, if later).
+
+    :raises ValueError: If the range spans more than MAX_ROLLUP_MONTHS months.
+
+    :return: List of monthly statistics, oldest first.
+    """
+    buckets = select(
+        EmploymentRollup.rollup_month,
+        func.sum(EmploymentRollup.rollup_hires),
+        func.sum(EmploymentRollup.rollup_separations),
+        func.sum(EmploymentRollup.rollup_separated_tenure_days),
+        func.sum(EmploymentRollup.rollup_start_day_total)
+    ).where(employer_condition).group_by(EmploymentRollup.rollup_month).order_by(EmploymentRollup.rollup_month)
+    if last_month is not None:
+        buckets = buckets.where(EmploymentRollup.rollup_month <= last_month)
+    buckets = db.session.execute(buckets).all()
+    if not buckets:
+        return []
+
+    first_month = first_month or buckets[0][0]
+    last_month = last_month or max(buckets[-1][0], month_start(date.today()))
+    if (last_month.year - first_month.year) * 12 + last_month.month - first_month.month >= MAX_ROLLUP_MONTHS:
+        raise ValueError("Invalid month range")
+
+    series = []
+    headcount = 0
+    start_day_total = 0
+    bucket_index = 0
+    month = min(first_month, buckets[0][0])
+    while month <= last_month:
+        hires = separations = tenure_days = 0
+        if bucket_index < len(buckets) and buckets[bucket_index][0] == month:
+            # MySQL returns the sums as decimals
+            hires, separations, tenure_days, start_days = map(int, buckets[bucket_index][1:])
+            start_day_total += start_days
+            bucket_index += 1
+        previous_headcount = headcount
+        headcount += hires - separations
+
+        if month >= first_month:
+            month_end = next_month(month) - timedelta(days=1)
+            average_headcount = (previous_headcount + headcount) / 2
+            series.append({
+                "month": month.strftime('%Y-%m'),
+                "headcount": headcount,
+                "hires": hires,
+                "separations": separations,
+                "turnoverRate": round(separations / average_headcount, 4) if average_headcount else None,
+                "averageTenureDays":
+                    round((headcount * month_end.toordinal() - start_day_total) / headcount, 1) if headcount else None,
+                "averageSeparatedTenureDays": round(tenure_days / separations, 1) if separations else None
             })
+        # Skip straight to the next month with changes while still before the reported range
+        if month < first_month:
+            month = min(buckets[bucket_index][0] if bucket_index < len(buckets) else first_month, first_month)
         else:
+            month = next_month(month)
+    return series
+
+
+def get_workforce_series(employer_condition):
+    try:
+        first_month = parse_month_arg(request.args, "from")
+        last_month = parse_month_arg(request.args, "to")
+        if first_month and last_month and first_month > last_month:
+            raise ValueError("Invalid month range")
+        series = fetch_workforce_series(employer_condition, first_month, last_month)
+    except ValueError as e:
+        return error_response(str(e), 400)
+    return success_response(f"{len(series)} months fetched", 200, series)
+
+
+@application.route('/employer/workforce', methods=['GET'])
+@query_budget(4)
+@use_read_replica()
+@jwt_required()
+def get_employer_workforce():
+    try:
+        employer_id = parse_int_arg(request.args, "employer_id")
+        if not employer_id:
+            raise ValueError("Invalid employer id")
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    try:
+        if not Employer.query.get(employer_id):
             return error_response("Employer not found", 404)
+
+        employer_condition = EmploymentRollup.employer_id == employer_id
+        if request.args.get("include_predecessors") == "true":
+            # Count the employers this one carries on from through rebrandings and mergers as part of its history
+            predecessor_ids = select(EmployerLineage.ancestor_employer_id).where(
+                EmployerLineage.descendant_employer_id == employer_id,
+                EmployerLineage.lineage_relation_mask.op("&")(ALL_RELATION_BITS & ~SUCCESSOR_RELATION_MASK) == 0
+            )
+            employer_condition = employer_condition | EmploymentRollup.employer_id.in_(predecessor_ids)
+        return get_workforce_series(employer_condition)
+    except Exception as e:
+        return error_response("Internal server error", 500)
+
+
+@application.route('/sector/workforce', methods=['GET'])
+@query_budget(2)
+@use_read_replica()
+@jwt_required()
+def get_sector_workforce():
+    try:
+        sector_code = parse_int_arg(request.args, "industry_sector_code")
+        if sector_code is None:
+            raise ValueError("Invalid industry sector code")
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    try:
+        return get_workforce_series(EmploymentRollup.employer_id.in_(
+            select(Employer.employer_id).where(Employer.employer_industry_sector_code == sector_code)))
     except Exception as e:
         return error_response("Internal server error", 500)
 
 
 @application.route('/employer', methods=['POST'])
+@query_budget(8)
 @admin_required()
 def create_employer():
     try:
@@ -518,6 +3239,10 @@ def create_employer():
                     employer_status, employer_legal_status]):
             return error_response("Missing required fields", 400)
 
+        is_valid, validation_message = validate_employer_data(data)
+        if not is_valid:
+            return error_response(validation_message, 400)
+
         new_employer = Employer(
             employer_name=employer_name,
             employer_addr_line_1=employer_addr_line_1,
@@ -525,16 +3250,21 @@ def create_employer():
             employer_addr_city=employer_addr_city,
             employer_addr_state=employer_addr_state,
             employer_addr_zip_code=employer_addr_zip_code,
-            employer_founded_date=employer_founded_date,
-            employer_dissolved_date=employer_dissolved_date,
-            employer_bankruptcy_date=employer_bankruptcy_date,
+            employer_founded_date=parse_date(employer_founded_date),
+            employer_dissolved_date=parse_date(employer_dissolved_date),
+            employer_bankruptcy_date=parse_date(employer_bankruptcy_date),
             employer_industry_sector_code=employer_industry_sector_code,
             employer_status=employer_status,
             employer_legal_status=employer_legal_status
         )
 
         db.session.add(new_employer)
+        assign_employer_component(new_employer)
+        employers_version = bump_data_version(EMPLOYERS_VERSION)
         db.session.commit()
+        employer_name_index.apply(employers_version, [(new_employer.employer_id, new_employer.employer_name)])
+        employer_facet_index.apply(employers_version, added=[employer_facet_key(new_employer)])
+        invalidate_employer_caches([new_employer.employer_id])
 
         return success_response("New employer added", 201, {"employer_id": new_employer.employer_id})
 
@@ -546,10 +3276,128 @@ def validate_date(date_string):
     try:
         datetime.strptime(date_string, '%Y-%m-%d')
         return True
-    except ValueError:
+    except (TypeError, ValueError):
         return False
 
 
+def parse_date(date_string):
+    """
+    Convert a "YYYY-MM-DD" string from a request into a date for a DATE column.
+
+    :raises ValueError: If the string is not a valid date.
+
+    :return: The date, or None for a missing value.
+    """
+    if date_string is None or date_string == "":
+        return None
+    return datetime.strptime(date_string, '%Y-%m-%d').date()
+
+
+def format_date(value):
+    """
+    Convert a date from a DATE column into the "YYYY-MM-DD" string used in responses.
+    """
+    return value.isoformat() if isinstance(value, date) else value
+
+
+def month_start(value):
+    return value.replace(day=1)
+
+
+def next_month(value):
+    return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def employment_rollup_changes(start_date, end_date, sign=1):
+    """
+    List the changes an employment makes to the monthly rollups of its employer.
+
+    :param start_date: The start date of the employment; employments without one are not counted.
+    :param end_date: The end date of the employment, or None while it is ongoing.
+    :param sign: 1 to add the employment to the rollups, -1 to take it out.
+
+    :return: Dictionary mapping each affected month to its [hires, separations, separated tenure days, start day
+        total] changes.
+    """
+    changes = {}
+    if start_date is None:
+        return changes
+    changes[month_start(start_date)] = [sign, 0, 0, sign * start_date.toordinal()]
+    if end_date is not None:
+        month_changes = changes.setdefault(month_start(end_date), [0, 0, 0, 0])
+        month_changes[1] += sign
+        month_changes[2] += sign * (end_date - start_date).days
+        month_changes[3] -= sign * start_date.toordinal()
+    return changes
+
+
+def apply_employment_rollup_changes(employer_id, *change_sets):
+    """
+    Add rollup changes to an employer's monthly buckets as part of the current transaction.
+
+    :param employer_id: The employer whose rollups change.
+    :param change_sets: Dictionaries returned by employment_rollup_changes, summed before being applied.
+    """
+    totals = {}
+    for changes in change_sets:
+        for month, month_changes in changes.items():
+            totals[month] = [a + b for a, b in zip(totals.get(month, [0, 0, 0, 0]), month_changes)]
+
+    for month, (hires, separations, tenure_days, start_days) in sorted(totals.items()):
+        if not any((hires, separations, tenure_days, start_days)):
+            continue
+        result = db.session.execute(
+            update(EmploymentRollup)
+            .where(EmploymentRollup.employer_id == employer_id, EmploymentRollup.rollup_month == month)
+            .values(rollup_hires=EmploymentRollup.rollup_hires + hires,
+                    rollup_separations=EmploymentRollup.rollup_separations + separations,
+                    rollup_separated_tenure_days=EmploymentRollup.rollup_separated_tenure_days + tenure_days,
+                    rollup_start_day_total=EmploymentRollup.rollup_start_day_total + start_days)
+        )
+        if result.rowcount == 0:
+            db.session.add(EmploymentRollup(employer_id=employer_id, rollup_month=month, rollup_hires=hires,
+                                            rollup_separations=separations,
+                                            rollup_separated_tenure_days=tenure_days,
+                                            rollup_start_day_total=start_days))
+            db.session.flush()
+
+
+def compute_employment_rollups(employments):
+    """
+    Compute the rollup rows of a set of employments from scratch.
+
+    :param employments: Tuples of (employer id, start date, end date).
+
+    :return: List of employment_rollups row dictionaries.
+    """
+    buckets = {}
+    for employer_id, start_date, end_date in employments:
+        for month, month_changes in employment_rollup_changes(start_date, end_date).items():
+            bucket = buckets.setdefault((employer_id, month), [0, 0, 0, 0])
+            for index, change in enumerate(month_changes):
+                bucket[index] += change
+    return [{"employer_id": employer_id, "rollup_month": month, "rollup_hires": hires,
+             "rollup_separations": separations, "rollup_separated_tenure_days": tenure_days,
+             "rollup_start_day_total": start_days}
+            for (employer_id, month), (hires, separations, tenure_days, start_days) in buckets.items()]
+
+
+def employer_existed_on(as_of):
+    """
+    SQL condition selecting the employers that had been founded and not yet dissolved on the given date.
+    """
+    return ((Employer.employer_founded_date.is_(None) | (Employer.employer_founded_date <= as_of)) &
+            (Employer.employer_dissolved_date.is_(None) | (Employer.employer_dissolved_date > as_of)))
+
+
+def relation_existed_on(as_of):
+    """
+    SQL condition selecting the employer relations that had started on the given date.
+    """
+    return EmployerRelation.employer_relation_start_date.is_(None) | \
+        (EmployerRelation.employer_relation_start_date <= as_of)
+
+
 def validate_employer_data(data):
     if 'employer_name' in data and (not data['employer_name'] or len(data['employer_name']) > 255):
         return False, "Invalid employer name."
@@ -557,7 +3405,7 @@ def validate_employer_data(data):
     if 'employer_addr_line_1' in data and (not data['employer_addr_line_1'] or len(data['employer_addr_line_1']) > 255):
         return False, "Invalid address line 1."
 
-    if 'employer_addr_line_2' in data and len(data['employer_addr_line_2']) > 255:
+    if 'employer_addr_line_2' in data and data['employer_addr_line_2'] and len(data['employer_addr_line_2']) > 255:
         return False, "Invalid address line 2."
 
     if 'employer_addr_city' in data and (not data['employer_addr_city'] or len(data['employer_addr_city']) > 255):
@@ -595,6 +3443,7 @@ def validate_employer_data(data):
 
 
 @application.route('/employer', methods=['PATCH'])
+@query_budget(8)
 @admin_required()
 def update_employer():
     try:
@@ -612,6 +3461,7 @@ def update_employer():
         if not employer:
             return error_response("Employer not found", 404)
 
+        old_facet_key = employer_facet_key(employer)
         if 'employer_name' in data:
             employer.employer_name = data['employer_name']
         if 'employer_addr_line_1' in data:
@@ -625,11 +3475,11 @@ def update_employer():
         if 'employer_addr_zip_code' in data:
             employer.employer_addr_zip_code = data['employer_addr_zip_code']
         if 'employer_founded_date' in data:
-            employer.employer_founded_date = data['employer_founded_date']
+            employer.employer_founded_date = parse_date(data['employer_founded_date'])
         if 'employer_dissolved_date' in data:
-            employer.employer_dissolved_date = data['employer_dissolved_date']
+            employer.employer_dissolved_date = parse_date(data['employer_dissolved_date'])
         if 'employer_bankruptcy_date' in data:
-            employer.employer_bankruptcy_date = data['employer_bankruptcy_date']
+            employer.employer_bankruptcy_date = parse_date(data['employer_bankruptcy_date'])
         if 'employer_industry_sector_code' in data:
             employer.employer_industry_sector_code = data['employer_industry_sector_code']
         if 'employer_status' in data:
@@ -637,7 +3487,11 @@ def update_employer():
         if 'employer_legal_status' in data:
             employer.employer_legal_status = data['employer_legal_status']
 
+        employers_version = bump_data_version(EMPLOYERS_VERSION)
         db.session.commit()
+        employer_name_index.apply(employers_version, [(employer.employer_id, employer.employer_name)])
+        employer_facet_index.apply(employers_version, [old_facet_key], [employer_facet_key(employer)])
+        invalidate_employer_caches([employer_id])
 
         updated_employer_info = {
             "employer_id": employer.employer_id,
@@ -647,9 +3501,9 @@ def update_employer():
             "employer_addr_city": employer.employer_addr_city,
             "employer_addr_state": employer.employer_addr_state,
             "employer_addr_zip_code": employer.employer_addr_zip_code,
-            "employer_founded_date": employer.employer_founded_date,
-            "employer_dissolved_date": employer.employer_dissolved_date,
-            "employer_bankruptcy_date": employer.employer_bankruptcy_date,
+            "employer_founded_date": format_date(employer.employer_founded_date),
+            "employer_dissolved_date": format_date(employer.employer_dissolved_date),
+            "employer_bankruptcy_date": format_date(employer.employer_bankruptcy_date),
             "employer_industry_sector_code": employer.employer_industry_sector_code,
             "employer_status": employer.employer_status,
             "employer_legal_status": employer.employer_legal_status
@@ -661,6 +3515,7 @@ def update_employer():
 
 
 @application.route('/employer/split', methods=['POST'])
+@query_budget(20)
 @admin_required()
 def split_employers():
     try:
@@ -674,6 +3529,10 @@ def split_employers():
         if not all([company_a_id, company_b_id, company_c_id, start_date]):
             return error_response("Missing required fields", 400)
 
+        if not validate_date(start_date):
+            return error_response("Invalid relation start date", 400)
+        start_date = parse_date(start_date)
+
         # Fetch employer IDs
         company_a = Employer.query.filter_by(employer_id=company_a_id).first()
         company_b = Employer.query.filter_by(employer_id=company_b_id).first()
@@ -697,7 +3556,10 @@ def split_employers():
                                             employer_relation_start_date=start_date)
 
         db.session.add_all([new_relation_a_b, new_relation_a_c])
+        staged_relations = stage_employer_relations([new_relation_a_b, new_relation_a_c])
         db.session.commit()
+        employer_relation_index.add_relations(*staged_relations)
+        invalidate_employer_caches([company_a_id, company_b_id, company_c_id], employer_list=False)
 
         return success_response("Employers successfully split", 200)
 
@@ -706,6 +3568,7 @@ def split_employers():
 
 
 @application.route('/employer/merge', methods=['POST'])
+@query_budget(20)
 @admin_required()
 def merge_employers():
     try:
@@ -720,6 +3583,10 @@ def merge_employers():
                     start_date]):
             return error_response("Missing required fields", 400)
 
+        if not validate_date(start_date):
+            return error_response("Invalid relation start date", 400)
+        start_date = parse_date(start_date)
+
         # Fetch employer IDs
         company_a = Employer.query.filter_by(employer_id=company_a_id).first()
         company_b = Employer.query.filter_by(employer_id=company_b_id).first()
@@ -743,7 +3610,10 @@ def merge_employers():
                                             employer_relation_start_date=start_date)
 
         db.session.add_all([new_relation_a_c, new_relation_b_c])
+        staged_relations = stage_employer_relations([new_relation_a_c, new_relation_b_c])
         db.session.commit()
+        employer_relation_index.add_relations(*staged_relations)
+        invalidate_employer_caches([company_a_id, company_b_id, company_c_id], employer_list=False)
 
         return success_response("Employers successfully merged", 200)
 
@@ -751,28 +3621,219 @@ def merge_employers():
         return error_response(str(e), 500)
 
 
-def send_email(data: dict):
+def send_email(data: dict, http=requests):
     """
-    :param data:
-    :raises EmailSendingError
+    Post an email to the email API.
+
+    :param data: The form data to post to the email API.
+    :param http: The requests module or a requests.Session to reuse connections with.
+
+    :raises InternalServerError: If the email API url is not configured.
+    :raises EmailSendingError: If the email API cannot be reached or responds with an error.
     """
     gmail_api_url = environ.get("GMAIL_API_URL")
     if not gmail_api_url:
         raise InternalServerError('Missing environment variable for email api')
 
-    response = requests.post(gmail_api_url, data=data)
+    started = time.perf_counter()
+    try:
+        response = http.post(gmail_api_url, data=data, timeout=application.config['EMAIL_API_TIMEOUT'])
+    except requests.exceptions.RequestException as e:
+        email_api_latency.observe(("error",), time.perf_counter() - started)
+        raise EmailSendingError("Something went wrong sending the email")
+    email_api_latency.observe((str(response.status_code),), time.perf_counter() - started)
 
     # Check the response status code for errors and raise EmailSendingError if necessary
     if response.status_code != 200:
         raise EmailSendingError("Failed to send email")
 
-    email_result = response.json()
-    error = email_result.get('error', None)
+    try:
+        email_result = response.json()
+    except ValueError:
+        email_result = {}
+    error = email_result.get('error', None) if isinstance(email_result, dict) else None
     if error:
         raise EmailSendingError(error)
 
 
+def dispatch_pending_emails(http=requests):
+    """
+    Send a batch of due emails from the outbox.
+
+    Due emails are first claimed in a short transaction: they are marked as sending with a lease of
+    EMAIL_LEASE_SECONDS and committed, so several dispatchers can drain the outbox side by side without holding row
+    locks while the email API is called. Each result is then recorded in its own short transaction. Failed sends are
+    retried with exponential backoff until EMAIL_MAX_ATTEMPTS is reached, after which the email is marked as failed.
+    Emails whose lease runs out, e.g. because the dispatcher died mid-batch, are claimed again.
+
+    :param http: The requests module or a requests.Session to reuse connections with.
+
+    :return: The number of emails that were attempted.
+    """
+    config = application.config
+    now = datetime.utcnow()
+    # DATETIME columns drop the microseconds, and the lease is compared again when recording the results
+    lease = now.replace(microsecond=0) + timedelta(seconds=config['EMAIL_LEASE_SECONDS'])
+    outbox_emails = db.session.execute(
+        select(EmailOutbox.email_outbox_id, EmailOutbox.email_payload, EmailOutbox.email_attempts)
+        .where(EmailOutbox.email_status.in_(("pending", "sending")), EmailOutbox.email_next_attempt_datetime <= now)
+        .order_by(EmailOutbox.email_next_attempt_datetime)
+        .limit(config['EMAIL_BATCH_SIZE'])
+        .with_for_update(skip_locked=True)
+    ).all()
+    if outbox_emails:
+        db.session.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.email_outbox_id.in_([outbox_email.email_outbox_id for outbox_email in outbox_emails]))
+            .values(email_status="sending", email_next_attempt_datetime=lease)
+        )
+    db.session.commit()
+
+    for outbox_email in outbox_emails:
+        try:
+            send_email(json.loads(outbox_email.email_payload), http)
+            result = {"email_status": "sent", "email_last_error": None}
+        except (EmailSendingError, InternalServerError) as e:
+            attempts = outbox_email.email_attempts + 1
+            result = {"email_attempts": attempts, "email_last_error": str(e)[:255]}
+            if attempts >= config['EMAIL_MAX_ATTEMPTS']:
+                result["email_status"] = "failed"
+            else:
+                delay = config['EMAIL_RETRY_BASE_SECONDS'] * 2 ** (attempts - 1)
+                result["email_status"] = "pending"
+                result["email_next_attempt_datetime"] = datetime.utcnow() + timedelta(seconds=delay)
+
+        # Leave the row alone if it was queued again or reclaimed after the lease ran out while sending
+        db.session.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.email_outbox_id == outbox_email.email_outbox_id,
+                   EmailOutbox.email_status == "sending",
+                   EmailOutbox.email_next_attempt_datetime == lease)
+            .values(**result)
+        )
+        db.session.commit()
+
+    return len(outbox_emails)
+
+
+class EmailDispatcher:
+    """
+    Background thread that drains the email outbox, so request handlers only ever enqueue emails.
+
+    The thread polls the outbox every EMAIL_POLL_SECONDS and is woken up early whenever a request queues an email.
+    """
+
+    def __init__(self, app):
+        self._app = app
+        self._wake_up = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self.run, name="email-dispatcher", daemon=True)
+                self._thread.start()
+
+    def wake(self):
+        self._wake_up.set()
+
+    def run(self):
+        http = requests.Session()
+        while True:
+            with self._app.app_context():
+                try:
+                    # Keep going without waiting while full batches are being sent
+                    while dispatch_pending_emails(http) >= self._app.config['EMAIL_BATCH_SIZE']:
+                        pass
+                except Exception as e:
+                    db.session.rollback()
+                    self._app.logger.exception("Email dispatch failed")
+            self._wake_up.wait(self._app.config['EMAIL_POLL_SECONDS'])
+            self._wake_up.clear()
+
+
+email_dispatcher = EmailDispatcher(application)
+
+
+@application.before_request
+def start_email_dispatcher():
+    if application.config['EMAIL_DISPATCHER'] == 'thread':
+        email_dispatcher.start()
+
+
+class RequestMetrics:
+    """
+    What the current request has done so far, kept on flask.g. The attributes live on one object so the statement
+    listeners only look g up once per statement.
+    """
+    __slots__ = ("started", "statement_count", "statement_seconds", "statements")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statement_count = 0
+        self.statement_seconds = 0
+        # The statements themselves are only collected while a @query_budget route runs
+        self.statements = None
+
+
+@application.before_request
+def start_request_metrics():
+    g.request_metrics = RequestMetrics()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def start_statement_timer(connection, cursor, statement, parameters, context, executemany):
+    connection.info["statement_started"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def count_request_statement(connection, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        request_metrics = g.get("request_metrics")
+        if request_metrics is not None:
+            request_metrics.statement_count += 1
+            request_metrics.statement_seconds += time.perf_counter() - connection.info["statement_started"]
+            if request_metrics.statements is not None:
+                request_metrics.statements.append(statement)
+
+
+@application.after_request
+def record_request_metrics(response):
+    request_metrics = g.get("request_metrics")
+    if request_metrics is None:
+        return response
+    if application.config['QUERY_COUNT_HEADER']:
+        response.headers['X-Query-Count'] = str(request_metrics.statement_count)
+    if application.config['METRICS_ENABLED']:
+        # Requests matching no route share one label, so unknown urls cannot grow the number of series
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        method = request.method
+        request_latency.observe((route, method, str(response.status_code)),
+                                time.perf_counter() - request_metrics.started)
+        request_statements.observe((route, method), request_metrics.statement_count)
+        request_db_time.inc((route, method), request_metrics.statement_seconds)
+    return response
+
+
+@application.route('/metrics', methods=['GET'])
+def metrics():
+    metrics_token = application.config['METRICS_TOKEN']
+    if not application.config['METRICS_ENABLED']:
+        return error_response("Metrics are disabled", 404)
+    if metrics_token and request.headers.get('Authorization') != f"Bearer {metrics_token}":
+        return error_response("Invalid metrics token", 401)
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
+@application.cli.command('dispatch-emails')
+def dispatch_emails():
+    """Send queued emails until interrupted, for deployments running with EMAIL_DISPATCHER=none."""
+    EmailDispatcher(application).run()
+
+
 @application.route('/request-admin', methods=['POST'])
+@query_budget(4)
 @jwt_required()
 def request_admin():
     try:
@@ -794,19 +3855,18 @@ def request_admin():
             # provide a link to be used in the email sent to team email
             "admin_request_url": f"{api_url}/grant-admin?email={email}&admin_token={email_admin_token}"
         }
-        send_email(data)
+        queue_email(f"admin_request:{email}", data)
+        db.session.commit()
+        email_dispatcher.wake()
 
         return success_response("Admin request submitted", 201)
 
-    except EmailSendingError as e:
-        return error_response(f"Email api responded with an error: {e}", 500)
-    except requests.exceptions.RequestException as e:
-        return error_response("Something went wrong sending the email", 500)
     except InternalServerError as e:
         return error_response(str(e), 500)
 
 
 @application.route('/grant-admin', methods=['GET'])
+@query_budget(6)
 def grant_admin():
     try:
         # Get parameters from the URL
@@ -829,7 +3889,6 @@ def grant_admin():
             return '<h1>User is already an admin</h1>', 400
 
         user.access_permissions = ADMIN_USER
-        db.session.commit()
 
         data = {
             "admin_token": email_admin_token,
@@ -837,15 +3896,280 @@ def grant_admin():
             "type": "admin_granted",
         }
 
-        send_email(data)
+        queue_email(f"admin_granted:{email}", data)
+        db.session.commit()
+        email_dispatcher.wake()
 
         return f'<h1>Admin permission for {email} were successfully granted and user has been notified via email</h1>'
 
-    except EmailSendingError as e:
+    except InternalServerError as e:
         return error_response(str(e), 500)
 
 
+def export_rows(table, export_format):
+    """
+    Stream every row of a table, in primary key order, as NDJSON or CSV.
+
+    Rows are read through a server-side cursor EXPORT_CHUNK_SIZE at a time and each chunk is emitted as soon as
+    it is encoded, so memory use does not depend on the size of the table.
+
+    :param table: The table to export.
+    :param export_format: "ndjson" or "csv".
+
+    :return: A generator of encoded chunks.
+    """
+    column_names = [column.name for column in table.columns]
+    query = select(table).order_by(*table.primary_key.columns).execution_options(yield_per=EXPORT_CHUNK_SIZE)
+
+    if export_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(column_names)
+        yield buffer.getvalue()
+
+    for chunk in db.session.execute(query).partitions():
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerows(chunk)
+            yield buffer.getvalue()
+        else:
+            yield "".join(application.json.dumps({name: format_date(value) for name, value in zip(column_names, row)})
+                          + "\n" for row in chunk)
+
+
+@application.route('/admin/export/<table_name>', methods=['GET'])
+@admin_required()
+def export_table(table_name):
+    tables = {
+        "employers": Employer.__table__,
+        "employer_relations": EmployerRelation.__table__,
+        "employments": Employment.__table__,
+    }
+    if table_name not in tables:
+        return error_response("Invalid export table", 404)
+
+    export_format = request.args.get("format", "ndjson")
+    if export_format not in ("ndjson", "csv"):
+        return error_response("Invalid export format", 400)
+
+    mimetype = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return Response(stream_with_context(export_rows(tables[table_name], export_format)), mimetype=mimetype,
+                    headers={"Content-Disposition": f"attachment; filename={table_name}.{export_format}"})
+
+
+def read_import_rows(stream, import_format):
+    """
+    Decode the rows of a bulk import body one at a time.
+
+    :param stream: The binary request body.
+    :param import_format: "ndjson" or "csv" (with a header row).
+
+    :return: A generator of (row number, row dictionary or None if the row could not be decoded).
+    """
+    lines = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    if import_format == "csv":
+        for row_number, row in enumerate(csv.DictReader(lines), start=1):
+            # CSV has no types or nulls: empty cells are missing values and numbers are sent as text
+            row = {key: value for key, value in row.items() if value != ""}
+            for key in ("employer_industry_sector_code", "parent_employer_id", "child_employer_id"):
+                if key in row and row[key].lstrip("-").isdigit():
+                    row[key] = int(row[key])
+            yield row_number, row
+    else:
+        row_number = 0
+        for line in lines:
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                row = json.loads(line)
+                yield row_number, row if isinstance(row, dict) else None
+            except ValueError:
+                yield row_number, None
+
+
+def validate_import_employer(row):
+    if not all(row.get(field) for field in REQUIRED_EMPLOYER_FIELDS):
+        return False, "Missing required fields"
+    return validate_employer_data(row)
+
+
+def validate_import_relation(row):
+    for field in ("parent_employer_id", "child_employer_id"):
+        if not isinstance(row.get(field), int):
+            return False, f"Invalid {field.replace('_', ' ')}."
+    if not row.get("employer_relation_type") or len(row["employer_relation_type"]) > 255:
+        return False, "Invalid relation type."
+    if not row.get("employer_relation_start_date") or not validate_date(row["employer_relation_start_date"]):
+        return False, "Invalid relation start date."
+    return True, ""
+
+
+def import_employer_batch(rows):
+    """
+    Insert a batch of validated employers with a single executemany and give each one its own component.
+
+    :param rows: Employer column dictionaries.
+
+    :return: A tuple (list of (row index, error message) for rejected rows, staged relations for the index), which
+        for employers never rejects rows or stages relations.
+    """
+    last_id = db.session.execute(select(func.max(Employer.employer_id))).scalar() or 0
+    db.session.execute(insert(Employer), rows)
+    db.session.execute(
+        update(Employer)
+        .where(Employer.employer_id > last_id, Employer.employer_component_id.is_(None))
+        .values(employer_component_id=Employer.employer_id)
+    )
+    bump_data_version(EMPLOYERS_VERSION)
+    return [], None
+
+
+def import_relation_batch(rows):
+    """
+    Insert a batch of validated relations with a single executemany and stage them like the relation routes do.
+
+    :param rows: Relation column dictionaries.
+
+    :return: A tuple (list of (row index, error message) for rejected rows, staged relations for the index).
+    """
+    employer_ids = {row["parent_employer_id"] for row in rows} | {row["child_employer_id"] for row in rows}
+    existing_ids = set(db.session.execute(
+        select(Employer.employer_id).where(Employer.employer_id.in_(employer_ids))
+    ).scalars())
+
+    errors = []
+    valid_rows = []
+    for index, row in enumerate(rows):
+        if row["parent_employer_id"] in existing_ids and row["child_employer_id"] in existing_ids:
+            valid_rows.append(row)
+        else:
+            errors.append((index, "Employer not found."))
+    if not valid_rows:
+        return errors, None
+
+    # The batch is read back to maintain the derived lineage data, by the ids the insert returns where the database
+    # supports RETURNING with executemany, and otherwise by its own column values among the ids past the previous
+    # maximum, so relations committed concurrently by other requests are not staged a second time
+    if db.session.get_bind().dialect.insert_executemany_returning:
+        batch_filters = [EmployerRelation.employer_relation_id.in_(db.session.execute(
+            insert(EmployerRelation).returning(EmployerRelation.employer_relation_id), valid_rows).scalars().all())]
+    else:
+        last_id = db.session.execute(select(func.max(EmployerRelation.employer_relation_id))).scalar() or 0
+        db.session.execute(insert(EmployerRelation), valid_rows)
+        batch_filters = [EmployerRelation.employer_relation_id > last_id, tuple_(
+            EmployerRelation.parent_employer_id, EmployerRelation.child_employer_id,
+            EmployerRelation.employer_relation_type, EmployerRelation.employer_relation_start_date
+        ).in_({(row["parent_employer_id"], row["child_employer_id"], row["employer_relation_type"],
+                row["employer_relation_start_date"]) for row in valid_rows})]
+    relations = EmployerRelation.query.filter(*batch_filters).order_by(EmployerRelation.employer_relation_id).all()
+    return errors, stage_employer_relations(relations)
+
+
+@application.route('/admin/import/<table_name>', methods=['POST'])
+@admin_required()
+def import_table(table_name):
+    importers = {
+        "employers": (IMPORT_EMPLOYER_FIELDS, validate_import_employer, import_employer_batch),
+        "employer_relations": (IMPORT_RELATION_FIELDS, validate_import_relation, import_relation_batch),
+    }
+    if table_name not in importers:
+        return error_response("Invalid import table", 404)
+    fields, validate_row, import_batch = importers[table_name]
+
+    import_format = request.args.get("format") or ("csv" if request.mimetype == "text/csv" else "ndjson")
+    if import_format not in ("ndjson", "csv"):
+        return error_response("Invalid import format", 400)
+    try:
+        batch_size = parse_int_arg(request.args, "batch_size") or IMPORT_BATCH_SIZE
+        if not 0 < batch_size <= MAX_IMPORT_BATCH_SIZE:
+            raise ValueError("Invalid batch size")
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    started = time.perf_counter()
+    imported = 0
+    errors = []
+    batch = []
+    batch_row_numbers = []
+
+    def flush_batch():
+        nonlocal imported
+        batch_errors, staged_relations = import_batch(batch)
+        db.session.commit()
+        if staged_relations:
+            employer_relation_index.add_relations(*staged_relations)
+            related_ids = {employer_id for relation in staged_relations[1] for employer_id in relation[1:3]}
+            invalidate_employer_caches(related_ids, employer_list=False)
+        else:
+            invalidate_employer_caches([])
+        errors.extend({"row": batch_row_numbers[index], "error": message} for index, message in batch_errors)
+        imported += len(batch) - len(batch_errors)
+        batch.clear()
+        batch_row_numbers.clear()
+
+    try:
+        for row_number, row in read_import_rows(request.stream, import_format):
+            if row is None:
+                errors.append({"row": row_number, "error": "Invalid row format."})
+                continue
+            try:
+                is_valid, validation_message = validate_row(row)
+            except Exception as e:
+                is_valid, validation_message = False, f"Invalid row: {e}"
+            if not is_valid:
+                errors.append({"row": row_number, "error": validation_message})
+                continue
+            batch.append({field: parse_date(row.get(field)) if field in IMPORT_DATE_FIELDS else row.get(field)
+                          for field in fields})
+            batch_row_numbers.append(row_number)
+            if len(batch) >= batch_size:
+                flush_batch()
+        if batch:
+            flush_batch()
+    except Exception as e:
+        db.session.rollback()
+        return error_response(f"Import stopped after {imported} rows: {e}", 500)
+
+    elapsed = time.perf_counter() - started
+    return success_response(f"{imported} rows imported", 200, {
+        "imported": imported,
+        "failed": len(errors),
+        "errors": errors,
+        "rowsPerSecond": round(imported / elapsed, 1) if elapsed else None
+    })
+
+
+@application.route('/admin/cache', methods=['GET'])
+@admin_required()
+def get_cache_stats():
+    return success_response("Cache statistics fetched", 200,
+                            {**response_cache.stats(), "layouts": graph_layout_cache.stats()})
+
+
+@application.route('/admin/naics-codes/refresh', methods=['POST'])
+@query_budget(4)
+@admin_required()
+def refresh_naics_codes():
+    try:
+        # Bumping the version makes every worker reload its copy on next use
+        version = bump_data_version(NAICS_CODES_VERSION)
+        db.session.commit()
+        sectors = naics_sector_map.ensure_current(version)
+        return success_response(f"{len(sectors)} NAICS sectors loaded", 200)
+    except Exception as e:
+        return error_response("Internal server error", 500)
+
+
+@application.route('/admin/search-index', methods=['GET'])
+@admin_required()
+def get_search_index_stats():
+    return success_response("Search index statistics fetched", 200, employer_name_index.stats())
+
+
 @application.route('/employer/delete', methods=['DELETE'])
+@query_budget(8)
 @admin_required()
 def delete_employer():
     try:
@@ -868,9 +4192,234 @@ def delete_employer():
         if not employer:
             return error_response("Employer not found", 404)
 
+        # Employers with relations cannot be deleted, so the employer is alone in its component and no other
+        # component ids need to be recomputed
+        deleted_id = employer.employer_id
+        deleted_facet_key = employer_facet_key(employer)
         db.session.delete(employer)
+        employers_version = bump_data_version(EMPLOYERS_VERSION)
         db.session.commit()
+        employer_name_index.apply(employers_version, removed_ids=[deleted_id])
+        employer_facet_index.apply(employers_version, removed=[deleted_facet_key])
+        invalidate_employer_caches([employer_id])
 
         return success_response("Employer successfully deleted", 200)
     except Exception as e:
         return error_response(str(e), 500)
+
+
+@application.cli.command('rebuild-employer-components')
+def rebuild_employer_components():
+    """Recompute the component id of every employer from employer_relations."""
+    groups = UnionFind()
+    employer_ids = db.session.execute(select(Employer.employer_id)).scalars().all()
+    for employer_id in employer_ids:
+        groups.find(employer_id)
+    for parent_id, child_id in db.session.execute(
+            select(EmployerRelation.parent_employer_id, EmployerRelation.child_employer_id)):
+        groups.union(parent_id, child_id)
+
+    smallest_ids = {}
+    for employer_id in employer_ids:
+        root = groups.find(employer_id)
+        smallest_ids[root] = min(smallest_ids.get(root, employer_id), employer_id)
+
+    db.session.execute(update(Employer), [
+        {"employer_id": employer_id, "employer_component_id": smallest_ids[groups.find(employer_id)]}
+        for employer_id in employer_ids
+    ])
+    db.session.commit()
+    click.echo(f"{len(employer_ids)} employers assigned to {len(smallest_ids)} components")
+
+
+@application.cli.command('rebuild-employer-lineage')
+def rebuild_employer_lineage():
+    """Recompute the employer_lineage closure table from employer_relations."""
+    rows = compute_employer_lineage(db.session.execute(
+        select(EmployerRelation.parent_employer_id, EmployerRelation.child_employer_id,
+               EmployerRelation.employer_relation_type).order_by(EmployerRelation.employer_relation_id)))
+
+    db.session.execute(EmployerLineage.__table__.delete())
+    for start in range(0, len(rows), 1000):
+        db.session.execute(insert(EmployerLineage), rows[start:start + 1000])
+    db.session.commit()
+    click.echo(f"{len(rows)} lineage paths recorded")
+
+
+@application.cli.command('rebuild-employment-rollups')
+def rebuild_employment_rollups():
+    """Recompute the employment_rollups table from employments."""
+    rows = compute_employment_rollups(db.session.execute(
+        select(Employment.employer_id, Employment.start_date, Employment.end_date)
+        .execution_options(yield_per=EXPORT_CHUNK_SIZE)))
+
+    db.session.execute(EmploymentRollup.__table__.delete())
+    for start in range(0, len(rows), 1000):
+        db.session.execute(insert(EmploymentRollup), rows[start:start + 1000])
+    db.session.commit()
+    click.echo(f"{len(rows)} employment rollup buckets recorded")
+
+
+# Schema migrations, applied in version order by `flask migrate-schema`. Each migration receives a connection inside
+# a transaction and must be safe to run against a database that already has some of its changes (e.g. one created
+# from the scripts in database/), so it inspects the schema before changing it.
+SCHEMA_MIGRATIONS = []
+
+
+def schema_migration(version, name):
+    def register(migrate):
+        SCHEMA_MIGRATIONS.append((version, name, migrate))
+        SCHEMA_MIGRATIONS.sort(key=lambda migration: migration[0])
+        return migrate
+
+    return register
+
+
+def create_missing_indexes(connection, tables):
+    """
+    Create the indexes declared on the models that the database does not have yet.
+
+    :param connection: The connection to run the DDL on.
+    :param tables: The model tables whose indexes should exist.
+    """
+    inspector = inspect(connection)
+    for table in tables:
+        existing_names = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_names:
+                index.create(connection)
+
+
+@schema_migration(1, "Lineage, email outbox and data version tables")
+def migrate_lineage_outbox_and_versions(connection):
+    for table in (DataVersion.__table__, EmployerLineage.__table__, EmailOutbox.__table__):
+        table.create(connection, checkfirst=True)
+
+    # The lineage routes read only employer_lineage, so it has to cover the relations that already exist
+    if connection.execute(select(EmployerLineage).limit(1)).first() is None:
+        rows = compute_employer_lineage(connection.execute(
+            select(EmployerRelation.parent_employer_id, EmployerRelation.child_employer_id,
+                   EmployerRelation.employer_relation_type).order_by(EmployerRelation.employer_relation_id)))
+        for start in range(0, len(rows), 1000):
+            connection.execute(insert(EmployerLineage), rows[start:start + 1000])
+
+    employer_columns = {column["name"] for column in inspect(connection).get_columns("employers")}
+    if "employer_component_id" not in employer_columns:
+        connection.execute(text("ALTER TABLE employers ADD COLUMN employer_component_id INTEGER"))
+
+    existing_versions = set(connection.execute(select(DataVersion.data_version_name)).scalars())
+    for name in (EMPLOYERS_VERSION, EMPLOYER_RELATIONS_VERSION):
+        if name not in existing_versions:
+            connection.execute(insert(DataVersion).values(data_version_name=name, data_version_number=0))
+
+
+@schema_migration(2, "Indexes for the hot query paths")
+def migrate_hot_path_indexes(connection):
+    create_missing_indexes(connection, [EmployerRelation.__table__, Employer.__table__, Employment.__table__,
+                                        EmployerLineage.__table__, EmailOutbox.__table__])
+
+
+@schema_migration(3, "Native DATE columns")
+def migrate_native_date_columns(connection):
+    # SQLite has no column types to change: its DATE columns hold the same "YYYY-MM-DD" text as before. On MySQL the
+    # conversion fails if a column still holds text that is not a valid date, which has to be fixed by hand first.
+    if connection.dialect.name in ("mysql", "mariadb"):
+        for table, columns in (("employers", ("employer_founded_date", "employer_dissolved_date",
+                                              "employer_bankruptcy_date")),
+                               ("employer_relations", ("employer_relation_start_date",)),
+                               ("employments", ("start_date", "end_date"))):
+            for column in columns:
+                connection.execute(text(f"ALTER TABLE {table} MODIFY COLUMN {column} DATE"))
+    create_missing_indexes(connection, [EmployerRelation.__table__, Employer.__table__])
+
+
+@schema_migration(4, "Monthly employment rollups")
+def migrate_employment_rollups(connection):
+    if inspect(connection).has_table(EmploymentRollup.__tablename__):
+        return
+    EmploymentRollup.__table__.create(connection)
+    rows = compute_employment_rollups(connection.execute(
+        select(Employment.employer_id, Employment.start_date, Employment.end_date)))
+    for start in range(0, len(rows), 1000):
+        connection.execute(insert(EmploymentRollup), rows[start:start + 1000])
+
+
+@application.cli.command('migrate-schema')
+def migrate_schema():
+    """Apply the pending schema migrations."""
+    SchemaMigration.__table__.create(db.engine, checkfirst=True)
+    applied_versions = set(db.session.execute(select(SchemaMigration.schema_migration_version)).scalars())
+    db.session.rollback()
+
+    pending_migrations = [migration for migration in SCHEMA_MIGRATIONS if migration[0] not in applied_versions]
+    for version, name, migrate in pending_migrations:
+        with db.engine.begin() as connection:
+            migrate(connection)
+            connection.execute(insert(SchemaMigration).values(
+                schema_migration_version=version,
+                schema_migration_name=name,
+                schema_migration_applied_datetime=datetime.utcnow()
+            ))
+        click.echo(f"Applied migration {version}: {name}")
+
+    if not pending_migrations:
+        click.echo("Schema is up to date")
+
+
+def hot_queries():
+    """
+    The statements behind the most frequent or most repeated lookups, which must always be served by an index.
+
+    :return: A list of (description, select statement).
+    """
+    return [
+        ("relations by parent", select(EmployerRelation).where(EmployerRelation.parent_employer_id.in_([1, 2]))),
+        ("relations by child", select(EmployerRelation).where(EmployerRelation.child_employer_id.in_([1, 2]))),
+        ("relations of an employer", select(EmployerRelation).where(
+            (EmployerRelation.parent_employer_id == 1) | (EmployerRelation.child_employer_id == 1))),
+        ("employers by component", select(Employer).where(Employer.employer_component_id == 1)),
+        ("employers by state", select(Employer).where(Employer.employer_addr_state == "AR")),
+        ("employers by status", select(Employer).where(Employer.employer_status == "Active")),
+        ("employers by sector", select(Employer).where(Employer.employer_industry_sector_code == 11)),
+        ("employers by founded date", select(Employer).where(Employer.employer_founded_date >= date(2000, 1, 1))),
+        ("employers by dissolved date", select(Employer).where(Employer.employer_dissolved_date > date(2000, 1, 1))),
+        ("lineage ancestors", select(EmployerLineage).where(EmployerLineage.descendant_employer_id == 1)),
+        ("lineage descendants", select(EmployerLineage).where(EmployerLineage.ancestor_employer_id == 1)),
+        ("employments by employee", select(Employment).where(Employment.employee_id == 1)),
+        ("employments by employer", select(Employment).where(Employment.employer_id == 1)),
+    ]
+
+
+def find_table_scans(statement):
+    """
+    EXPLAIN a statement and report the tables it reads with a full scan.
+
+    :param statement: The select statement to explain.
+
+    :return: A list of descriptions of the full scans in the query plan.
+    """
+    dialect = db.engine.dialect
+    sql = str(statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    if dialect.name == "sqlite":
+        plan = db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+        # SQLite reports index lookups as "SEARCH" and plain table scans as "SCAN <table>" without an index
+        return [row[-1] for row in plan if row[-1].startswith("SCAN") and "INDEX" not in row[-1]]
+
+    plan = db.session.execute(text(f"EXPLAIN {sql}")).mappings().all()
+    return [f"{row['table']} (type ALL)" for row in plan if row["type"] == "ALL"]
+
+
+@application.cli.command('explain-hot-queries')
+def explain_hot_queries():
+    """Fail if any hot query's plan falls back to a full table scan."""
+    regressions = 0
+    for description, statement in hot_queries():
+        scans = find_table_scans(statement)
+        if scans:
+            regressions += 1
+            click.echo(f"FULL SCAN  {description}: {', '.join(scans)}")
+        else:
+            click.echo(f"ok         {description}")
+
+    if regressions:
+        raise click.ClickException(f"{regressions} hot queries scan whole tables")
@@ -0,0 +1,11 @@
+"""
+Benchmarks for the backend API.
+
+* generator: fills a database with synthetic employers, relations, employees, employments and users
+* bench_routes: pytest-benchmark micro-benchmarks of the route handlers (``pytest benchmarks/bench_routes.py``)
+* load: multi-process HTTP load driver reporting latency percentiles, throughput and queries per request
+* serialization: comparison of the employer list serialization paths and JSON providers
+
+Every module selects its database with the DATABASE_URL environment variable (any SQLAlchemy URL, e.g. SQLite or a
+local MySQL container), so the benchmarks never need the DB_* settings of a real deployment.
+"""
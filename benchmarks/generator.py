@@ -0,0 +1,197 @@
+"""
+Synthetic data generator for benchmarks.
+
+Employers are generated in connected components of a tunable size and shape:
+
+* chains: deep rebranding chains, each employer rebranded into the next
+* spinoffs: wide spin-off trees, each employer spinning off up to --spinoff-width children
+* mergers: dense merger DAGs, each employer the merger of --merger-parents earlier ones
+* mixed: a random one of the above for every component
+
+Employees get random employments (most of them closed), and a benchmark admin user is created along with the
+requested number of regular users. The derived tables (component ids, lineage and employment rollups) are rebuilt
+once the rows are loaded.
+
+Run from the root directory with the virtual environment active:
+
+    python -m benchmarks.generator --database-url sqlite:///benchmark.db --employers 100000 --shape mixed --reset
+"""
+import argparse
+import random
+from datetime import date, timedelta
+from os import environ
+
+SHAPES = ("chains", "spinoffs", "mergers")
+BENCHMARK_ADMIN_EMAIL = "benchmark@example.com"
+BENCHMARK_ADMIN_PASSWORD = "benchmark"
+
+STATES = ["TX", "CA", "NY", "CO", "MA", "WA", "IL", "FL"]
+CITIES = ["Austin", "Dallas", "Denver", "Boston", "Seattle", "Chicago", "Miami", "Albany"]
+SECTOR_CODES = [11, 21, 22, 23, 31, 42, 44, 48, 51, 52, 54, 62, 72]
+LEGAL_STATUSES = ["LLC", "Corporation", "Partnership", "Sole Proprietorship"]
+NAME_WORDS = ["Acme", "Global", "United", "Pioneer", "Summit", "Harbor", "Evergreen", "Atlas", "Beacon", "Crescent",
+              "Frontier", "Keystone", "Meridian", "Northwind", "Orion", "Pinnacle", "Redwood", "Sterling", "Vertex"]
+NAME_SUFFIXES = ["Holdings", "Industries", "Systems", "Partners", "Group", "Labs", "Logistics", "Foods", "Energy"]
+
+
+def component_relations(employer_ids, shape, generator, spinoff_width, merger_parents):
+    """
+    Connect the employers of one component.
+
+    :param employer_ids: The ids of the component's employers, oldest first.
+    :param shape: One of SHAPES.
+    :param generator: The random.Random instance to draw from.
+    :param spinoff_width: The maximum number of children of an employer in a spin-off tree.
+    :param merger_parents: The number of employers merging into each employer of a merger DAG.
+
+    :return: List of (parent id, child id, relation type) tuples.
+    """
+    relations = []
+    for index in range(1, len(employer_ids)):
+        if shape == "chains":
+            relations.append((employer_ids[index - 1], employer_ids[index], "Rebranding"))
+        elif shape == "spinoffs":
+            relations.append((employer_ids[(index - 1) // spinoff_width], employer_ids[index], "Spin-off"))
+        else:
+            for parent_index in generator.sample(range(index), min(merger_parents, index)):
+                relations.append((employer_ids[parent_index], employer_ids[index], "Merger"))
+    return relations
+
+
+def generate_rows(employers=10000, component_size=20, shape="mixed", spinoff_width=8, merger_parents=2,
+                  employees=None, employments_per_employee=3, users=10, seed=0):
+    """
+    Generate the rows of a synthetic dataset.
+
+    :return: Dictionary from table name to a list of row dictionaries, with explicit ids starting at 1.
+    """
+    generator = random.Random(seed)
+    rows = {"employers": [], "employer_relations": [], "employees": [], "employments": [], "users": []}
+
+    for first_id in range(1, employers + 1, component_size):
+        employer_ids = list(range(first_id, min(first_id + component_size, employers + 1)))
+        component_shape = generator.choice(SHAPES) if shape == "mixed" else shape
+        founded_date = date(1900, 1, 1) + timedelta(days=generator.randrange(30000))
+        founded_dates = {}
+        for employer_id in employer_ids:
+            founded_dates[employer_id] = founded_date
+            dissolved = generator.random() < 0.1
+            rows["employers"].append({
+                "employer_id": employer_id,
+                "employer_name": f"{generator.choice(NAME_WORDS)} {generator.choice(NAME_WORDS)} "
+                                 f"{generator.choice(NAME_SUFFIXES)} {employer_id}",
+                "employer_addr_line_1": f"{generator.randrange(1, 9999)} Main St",
+                "employer_addr_line_2": None,
+                "employer_addr_city": generator.choice(CITIES),
+                "employer_addr_state": generator.choice(STATES),
+                "employer_addr_zip_code": str(generator.randrange(10000, 99999)),
+                "employer_founded_date": founded_date,
+                "employer_dissolved_date": founded_date + timedelta(days=3650) if dissolved else None,
+                "employer_bankruptcy_date": None,
+                "employer_industry_sector_code": generator.choice(SECTOR_CODES),
+                "employer_status": "Dissolved" if dissolved else "Active",
+                "employer_legal_status": generator.choice(LEGAL_STATUSES),
+            })
+            founded_date += timedelta(days=generator.randrange(30, 900))
+
+        for parent_id, child_id, relation_type in component_relations(employer_ids, component_shape, generator,
+                                                                      spinoff_width, merger_parents):
+            rows["employer_relations"].append({
+                "employer_relation_id": len(rows["employer_relations"]) + 1,
+                "parent_employer_id": parent_id,
+                "child_employer_id": child_id,
+                "employer_relation_type": relation_type,
+                "employer_relation_start_date": founded_dates[child_id],
+            })
+
+    employees = employers // 2 if employees is None else employees
+    for employee_id in range(1, employees + 1):
+        rows["employees"].append({
+            "employee_id": employee_id,
+            "employee_first_name": f"First{employee_id}",
+            "employee_middle_name": None,
+            "employee_last_name": f"Last{employee_id}",
+        })
+        start_date = date(1990, 1, 1) + timedelta(days=generator.randrange(9000))
+        for index in range(generator.randint(1, 2 * employments_per_employee - 1)):
+            end_date = start_date + timedelta(days=generator.randrange(90, 3000))
+            is_current = end_date > date.today() or generator.random() < 0.2
+            rows["employments"].append({
+                "employment_id": len(rows["employments"]) + 1,
+                "employee_id": employee_id,
+                "employer_id": generator.randint(1, employers),
+                "job_title": generator.choice(["Engineer", "Analyst", "Manager", "Clerk", "Director"]),
+                "start_date": start_date,
+                "end_date": None if is_current else end_date,
+            })
+            if is_current:
+                break
+            start_date = end_date + timedelta(days=generator.randrange(1, 120))
+
+    for user_id in range(1, users + 2):
+        is_admin = user_id == 1
+        rows["users"].append({
+            "user_id": user_id,
+            "user_first_name": "Benchmark",
+            "user_last_name": "Admin" if is_admin else f"User{user_id}",
+            "email_address": BENCHMARK_ADMIN_EMAIL if is_admin else f"user{user_id}@example.com",
+            "password": BENCHMARK_ADMIN_PASSWORD,
+            "access_permissions": "2" if is_admin else "1",
+        })
+    return rows
+
+
+def populate(rows, reset=False):
+    """
+    Load generated rows into the database of the application and rebuild the derived tables.
+
+    :param rows: Rows returned by generate_rows.
+    :param reset: Drop and recreate every table first.
+    """
+    from sqlalchemy import insert
+
+    from application import application, db
+
+    with application.app_context():
+        if reset:
+            db.drop_all()
+        db.create_all()
+        for table_name, table_rows in rows.items():
+            table = db.metadata.tables[table_name]
+            for start in range(0, len(table_rows), 5000):
+                db.session.execute(insert(table), table_rows[start:start + 5000])
+        db.session.commit()
+
+    runner = application.test_cli_runner()
+    for command in ("rebuild-employer-components", "rebuild-employer-lineage", "rebuild-employment-rollups"):
+        result = runner.invoke(args=[command])
+        if result.exit_code != 0:
+            raise RuntimeError(f"{command} failed: {result.output}") from result.exception
+        print(result.output.strip())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill a database with synthetic benchmark data.")
+    parser.add_argument("--database-url", default=environ.get("DATABASE_URL", "sqlite:///benchmark.db"))
+    parser.add_argument("--employers", type=int, default=10000)
+    parser.add_argument("--component-size", type=int, default=20)
+    parser.add_argument("--shape", choices=("mixed",) + SHAPES, default="mixed")
+    parser.add_argument("--spinoff-width", type=int, default=8)
+    parser.add_argument("--merger-parents", type=int, default=2)
+    parser.add_argument("--employees", type=int, default=None, help="defaults to half the number of employers")
+    parser.add_argument("--employments-per-employee", type=int, default=3)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reset", action="store_true", help="drop and recreate every table first")
+    args = parser.parse_args()
+
+    environ["DATABASE_URL"] = args.database_url
+    rows = generate_rows(args.employers, args.component_size, args.shape, args.spinoff_width, args.merger_parents,
+                         args.employees, args.employments_per_employee, args.users, args.seed)
+    populate(rows, args.reset)
+    print(", ".join(f"{len(table_rows)} {table_name}" for table_name, table_rows in rows.items()) + " generated")
+    print(f"Log in as {BENCHMARK_ADMIN_EMAIL} / {BENCHMARK_ADMIN_PASSWORD}")
+
+
+if __name__ == "__main__":
+    main()
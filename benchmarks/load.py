@@ -0,0 +1,117 @@
+"""
+Multi-process HTTP load driver.
+
+Every worker process logs in, then requests the routes of a scenario back to back for the given duration. The
+driver reports the p50 and p99 latency and the throughput of every route and of the whole run. When the server runs
+with QUERY_COUNT_HEADER=true it also reports the mean number of SQL statements per request.
+
+Run from the root directory against a running server, e.g. one started on a generated database with
+
+    DATABASE_URL=sqlite:///benchmark.db QUERY_COUNT_HEADER=true flask run
+    python -m benchmarks.load --url http://127.0.0.1:5000 --workers 8 --duration 30 --scenario mixed
+"""
+import argparse
+import random
+import time
+from multiprocessing import Pool
+
+import requests
+
+from benchmarks.generator import BENCHMARK_ADMIN_EMAIL, BENCHMARK_ADMIN_PASSWORD
+
+SEARCH_QUERIES = ["acme", "global hold", "pinacle", "northwind systms", "sterling"]
+
+
+def scenario_requests(scenario, employer_ids, generator):
+    """
+    :return: A (route name, method, path, params or JSON body) tuple for the next request of the scenario.
+    """
+    if scenario == "mixed":
+        scenario = generator.choices(["list", "graph", "search", "facets", "lineage"], [3, 4, 1, 1, 1])[0]
+    if scenario == "list":
+        return "/employers", "GET", "/employers", {"limit": 100, "after": generator.choice(employer_ids)}
+    if scenario == "graph":
+        return "/employers-graph", "GET", "/employers-graph", {"employer_id": generator.choice(employer_ids)}
+    if scenario == "search":
+        return "/employers/search", "GET", "/employers/search", {"q": generator.choice(SEARCH_QUERIES)}
+    if scenario == "facets":
+        return "/employers/facets", "GET", "/employers/facets", {"state": generator.choice(["TX", "CA", "NY"])}
+    return "/employer/ancestors", "GET", "/employer/ancestors", {"employer_id": generator.choice(employer_ids)}
+
+
+def run_worker(arguments):
+    """
+    Send requests until the deadline.
+
+    :return: List of (route name, latency in seconds, status code, query count or None) tuples.
+    """
+    url, token, scenario, employer_ids, deadline, seed = arguments
+    generator = random.Random(seed)
+    session = requests.Session()
+    session.headers["Authorization"] = f"Bearer {token}"
+    results = []
+    while time.time() < deadline:
+        name, method, path, params = scenario_requests(scenario, employer_ids, generator)
+        started = time.perf_counter()
+        try:
+            response = session.request(method, url + path, params=params, timeout=30)
+            status = response.status_code
+            query_count = response.headers.get("X-Query-Count")
+        except requests.exceptions.RequestException:
+            status, query_count = None, None
+        results.append((name, time.perf_counter() - started, status, int(query_count) if query_count else None))
+    return results
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def summarize(name, results, duration):
+    latencies = sorted(latency for _, latency, _, _ in results)
+    errors = sum(1 for _, _, status, _ in results if status != 200)
+    query_counts = [count for _, _, _, count in results if count is not None]
+    queries = f"{sum(query_counts) / len(query_counts):8.1f}" if query_counts else f"{'n/a':>8}"
+    return (f"{name:<22}{len(results):>9}{errors:>8}{len(results) / duration:>10.1f}"
+            f"{percentile(latencies, 0.5) * 1000:>10.1f}{percentile(latencies, 0.99) * 1000:>10.1f}{queries}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive HTTP load against a running server.")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--email", default=BENCHMARK_ADMIN_EMAIL)
+    parser.add_argument("--password", default=BENCHMARK_ADMIN_PASSWORD)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10, help="seconds")
+    parser.add_argument("--scenario", choices=("mixed", "list", "graph", "search", "facets", "lineage"),
+                        default="mixed")
+    args = parser.parse_args()
+
+    login = requests.post(f"{args.url}/login", json={"email": args.email, "password": args.password}, timeout=30)
+    login.raise_for_status()
+    token = login.json()["data"]["jwt"]
+    employers = requests.get(f"{args.url}/employers", params={"limit": 1000, "fields": "id"},
+                             headers={"Authorization": f"Bearer {token}"}, timeout=30)
+    employers.raise_for_status()
+    employer_ids = [employer["id"] for employer in employers.json()["data"]["employers"]]
+
+    deadline = time.time() + args.duration
+    with Pool(args.workers) as pool:
+        worker_results = pool.map(run_worker, [(args.url, token, args.scenario, employer_ids, deadline, seed)
+                                               for seed in range(args.workers)])
+    results = [result for results in worker_results for result in results]
+    if not results:
+        raise SystemExit("No requests completed")
+
+    print(f"{args.workers} workers, {args.duration:g} s, scenario {args.scenario}")
+    print(f"{'route':<22}{'requests':>9}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'queries':>8}")
+    routes = {}
+    for result in results:
+        routes.setdefault(result[0], []).append(result)
+    for name in sorted(routes):
+        print(summarize(name, routes[name], args.duration))
+    print(summarize("all", results, args.duration))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Micro-benchmark of the employer list serialization paths.
+
+Loads synthetic employers into an in-memory SQLite database and times building the `/employers?all=true` response
+body with each combination of EMPLOYER_SERIALIZATION ("orm": Employer objects and Employer.to_front_end, "rows":
+column tuples and employer_row_serializer) and JSON provider (Flask's default and, when installed, orjson). The
+payloads are built by serialize_employer_rows, the function the route calls.
+
+Run from the root directory with the virtual environment active:
+
+    python -m benchmarks.serialization --employers 100000
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+from os import environ
+
+# The benchmark loads its employers into the application's database, so keep the application away from a real one
+environ["DATABASE_URL"] = "sqlite://"
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import insert
+
+import application
+from application import Employer, db, parse_employer_list_args, serialize_employer_rows
+
+
+def synthetic_employers(count, seed=0):
+    """
+    :return: A list of employers table row dictionaries.
+    """
+    generator = random.Random(seed)
+    rows = []
+    for employer_id in range(1, count + 1):
+        founded_date = date(1950, 1, 1) + timedelta(days=generator.randrange(25000))
+        rows.append({
+            "employer_id": employer_id,
+            "employer_name": f"Employer {employer_id}",
+            "employer_addr_line_1": f"{generator.randrange(1, 9999)} Main St",
+            "employer_addr_line_2": None,
+            "employer_addr_city": generator.choice(["Austin", "Dallas", "Houston", "Denver", "Boston"]),
+            "employer_addr_state": generator.choice(["TX", "CO", "MA"]),
+            "employer_addr_zip_code": f"{generator.randrange(10000, 99999)}",
+            "employer_founded_date": founded_date,
+            "employer_dissolved_date": founded_date + timedelta(days=9000) if employer_id % 5 == 0 else None,
+            "employer_bankruptcy_date": None,
+            "employer_industry_sector_code": generator.choice([11, 21, 22, 23, 31]),
+            "employer_status": "Dissolved" if employer_id % 5 == 0 else "Active",
+            "employer_legal_status": generator.choice(["LLC", "Corporation", "Partnership"]),
+            "employer_component_id": employer_id,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--employers", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per combination, the fastest is reported")
+    args = parser.parse_args()
+
+    providers = {"default": DefaultJSONProvider(application.application)}
+    if application.orjson is not None:
+        providers["orjson"] = application.OrjsonProvider(application.application)
+
+    config = application.application.config
+    with application.application.test_request_context():
+        Employer.__table__.create(db.engine)
+        db.session.execute(insert(Employer), synthetic_employers(args.employers))
+        db.session.commit()
+        query, fields = parse_employer_list_args({})
+        print(f"{args.employers} employers, best of {args.repeat} runs")
+        print(f"{'serialization':<14}{'provider':<10}{'payloads (s)':>14}{'json (s)':>10}{'total (s)':>11}")
+        for serialization in ("orm", "rows"):
+            config['EMPLOYER_SERIALIZATION'] = serialization
+            for provider_name, provider in providers.items():
+                timings = []
+                for _ in range(args.repeat):
+                    db.session.expunge_all()
+                    started = time.perf_counter()
+                    rows, payloads = serialize_employer_rows(query, fields)
+                    built = time.perf_counter()
+                    provider.response({"message": "", "data": payloads}).get_data()
+                    timings.append((built - started, time.perf_counter() - built))
+                payload_time, json_time = min(timings, key=sum)
+                print(f"{serialization:<14}{provider_name:<10}{payload_time:>14.3f}{json_time:>10.3f}"
+                      f"{payload_time + json_time:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -62,7 +62,10 @@ CREATE TABLE employer_relations (
     parent_employer_id INT,
     child_employer_id INT,
     employer_relation_type VARCHAR(255),
-    employer_relation_start_date VARCHAR(10)
+    employer_relation_start_date DATE,
+    INDEX idx_employer_relations_parent_child (parent_employer_id, child_employer_id),
+    INDEX idx_employer_relations_child_parent (child_employer_id, parent_employer_id),
+    INDEX idx_employer_relations_start_date (employer_relation_start_date)
 );
 
 -- Create table containing employers and employer data.
@@ -74,12 +77,35 @@ CREATE TABLE employers (
     employer_addr_city VARCHAR(255),
     employer_addr_state VARCHAR(2),
     employer_addr_zip_code VARCHAR(10),
-    employer_founded_date VARCHAR(10),
-    employer_dissolved_date VARCHAR(10) DEFAULT NULL,
-    employer_bankruptcy_date VARCHAR(10) DEFAULT NULL,
+    employer_founded_date DATE,
+    employer_dissolved_date DATE DEFAULT NULL,
+    employer_bankruptcy_date DATE DEFAULT NULL,
     employer_industry_sector_code INT,
     employer_status VARCHAR(255),
-    employer_legal_status VARCHAR(255)
+    employer_legal_status VARCHAR(255),
+    -- Smallest employer id in the employer's connected lineage, filled in by
+    -- `flask rebuild-employer-components`.
+    employer_component_id INT DEFAULT NULL,
+    INDEX idx_employers_component_id (employer_component_id),
+    INDEX idx_employers_state_city (employer_addr_state, employer_addr_city),
+    INDEX idx_employers_status (employer_status),
+    INDEX idx_employers_industry_sector_code (employer_industry_sector_code),
+    INDEX idx_employers_founded_date (employer_founded_date),
+    INDEX idx_employers_dissolved_date (employer_dissolved_date)
+);
+
+-- Create table containing the transitive closure of employer_relations: one
+-- row per distinct path from an ancestor employer to a descendant employer.
+-- lineage_relation_mask has a bit set for every relation type on the path
+-- (1 = Rebranding, 2 = Spin-off, 4 = Merger, 8 = any other type). Filled in below
+-- for the dummy relations and by `flask rebuild-employer-lineage`.
+CREATE TABLE employer_lineage (
+    ancestor_employer_id INT,
+    descendant_employer_id INT,
+    lineage_depth INT,
+    lineage_relation_mask INT,
+    PRIMARY KEY (ancestor_employer_id, descendant_employer_id, lineage_depth, lineage_relation_mask),
+    INDEX idx_employer_lineage_descendant (descendant_employer_id)
 );
 
 -- Create table of employment relations between employee and employer.
@@ -88,8 +114,24 @@ CREATE TABLE employments (
     employee_id INT,
     employer_id INT,
     job_title VARCHAR(255),
-    start_date VARCHAR(10),
-    end_date VARCHAR(10) DEFAULT NULL
+    start_date DATE,
+    end_date DATE DEFAULT NULL,
+    INDEX idx_employments_employee_id (employee_id),
+    INDEX idx_employments_employer_id (employer_id)
+);
+
+-- Create table of monthly changes to each employer's workforce: hires,
+-- separations, the total tenure of the separated employees, and the change in
+-- the sum of the start date ordinals of the active employees. Kept up to date
+-- by the employment routes; filled in by `flask rebuild-employment-rollups`.
+CREATE TABLE employment_rollups (
+    employer_id INT,
+    rollup_month DATE,
+    rollup_hires INT DEFAULT 0,
+    rollup_separations INT DEFAULT 0,
+    rollup_separated_tenure_days BIGINT DEFAULT 0,
+    rollup_start_day_total BIGINT DEFAULT 0,
+    PRIMARY KEY (employer_id, rollup_month)
 );
 
 -- Create table of NAICS codes.
@@ -100,6 +142,37 @@ CREATE TABLE naics_codes (
     naics_release_year VARCHAR(4)
 );
 
+-- Create table of version counters that are bumped whenever the named data
+-- changes, so every application worker can tell when its in-memory copies are
+-- stale.
+CREATE TABLE data_versions (
+    data_version_name VARCHAR(64) PRIMARY KEY,
+    data_version_number INT NOT NULL DEFAULT 0
+);
+
+-- Create table of emails waiting to be sent (or already sent) by the email
+-- dispatcher. Request handlers only add rows here; `email_dedupe_key` makes
+-- sure the same email is never queued twice.
+CREATE TABLE email_outbox (
+    email_outbox_id INT AUTO_INCREMENT PRIMARY KEY,
+    email_dedupe_key VARCHAR(255) UNIQUE,
+    email_payload TEXT,
+    email_status VARCHAR(16),
+    email_attempts INT DEFAULT 0,
+    email_next_attempt_datetime DATETIME,
+    email_last_error VARCHAR(255) DEFAULT NULL,
+    email_created_datetime DATETIME,
+    INDEX idx_email_outbox_status (email_status)
+);
+
+-- Create table recording the schema migrations (see `flask migrate-schema`)
+-- already applied to this database.
+CREATE TABLE schema_migrations (
+    schema_migration_version INT PRIMARY KEY,
+    schema_migration_name VARCHAR(255),
+    schema_migration_applied_datetime DATETIME
+);
+
 -- Create table of application users, their demographic information, and
 -- access permissions data.
 CREATE TABLE users (
@@ -222,6 +295,44 @@ VALUES
     (19, 20, "Spin-off", "2012-07-28"),
     (19, 21, "Spin-off", "2012-07-28");
 
+-- Fill in the transitive closure of the employer relations inserted above, the
+-- same rows `flask rebuild-employer-lineage` would record.
+INSERT INTO backend_test.employer_lineage (
+    ancestor_employer_id,
+    descendant_employer_id,
+    lineage_depth,
+    lineage_relation_mask
+)
+WITH RECURSIVE relation_bits AS (
+    SELECT
+        parent_employer_id,
+        child_employer_id,
+        CASE employer_relation_type
+            WHEN "Rebranding" THEN 1
+            WHEN "Spin-off" THEN 2
+            WHEN "Merger" THEN 4
+            ELSE 8
+        END AS relation_bit
+    FROM backend_test.employer_relations
+), lineage_paths (
+    ancestor_employer_id,
+    descendant_employer_id,
+    lineage_depth,
+    lineage_relation_mask
+) AS (
+    SELECT parent_employer_id, child_employer_id, 1, relation_bit
+    FROM relation_bits
+    UNION
+    SELECT
+        lineage_paths.ancestor_employer_id,
+        relation_bits.child_employer_id,
+        lineage_paths.lineage_depth + 1,
+        lineage_paths.lineage_relation_mask | relation_bits.relation_bit
+    FROM lineage_paths
+    JOIN relation_bits ON relation_bits.parent_employer_id = lineage_paths.descendant_employer_id
+)
+SELECT * FROM lineage_paths;
+
 -- Create and insert employment records.
 INSERT INTO backend_test.employments (
     employee_id,
@@ -313,3 +424,26 @@ VALUES
     ("Cory", "Eheart", "cleheart@ualr.edu", "coryspassword", "2023-10-01 17:33:13", '2'),
     ("Brandon", "Huckaby", "bkhuckaby@ualr.edu", "brandonspassword", "2023-10-01 17:34:14", '2'),
     ("Luka", "Woodson", "llwoodson@ualr.edu", "lukaspassword", "2023-10-01 17:35:15", '2');
+
+-- Seed the data version counters.
+INSERT INTO backend_test.data_versions (
+    data_version_name,
+    data_version_number
+)
+VALUES
+    ("employers", 0),
+    ("employer_relations", 0),
+    ("naics_codes", 0);
+
+-- This script already builds the latest schema, so mark every migration as
+-- applied.
+INSERT INTO backend_test.schema_migrations (
+    schema_migration_version,
+    schema_migration_name,
+    schema_migration_applied_datetime
+)
+VALUES
+    (1, "Lineage, email outbox and data version tables", NOW()),
+    (2, "Indexes for the hot query paths", NOW()),
+    (3, "Native DATE columns", NOW()),
+    (4, "Monthly employment rollups", NOW());
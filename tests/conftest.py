@@ -0,0 +1,59 @@
+"""
+Fixtures running the application against a fresh in-memory SQLite database for every test.
+
+Run from the root directory with ``pytest tests``.
+"""
+from os import environ
+
+environ.setdefault("DATABASE_URL", "sqlite://")
+environ.setdefault("SECRET_KEY", "test-secret-key-of-sufficient-length")
+environ.setdefault("EMAIL_DISPATCHER", "none")
+environ.setdefault("QUERY_BUDGET_MODE", "raise")
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+import application
+
+IN_PROCESS_INDEXES = [application.employer_relation_index, application.employer_name_index,
+                      application.naics_sector_map, application.employer_facet_index]
+
+
+@pytest.fixture
+def app():
+    with application.application.app_context():
+        application.db.drop_all()
+        application.db.create_all()
+        for index in IN_PROCESS_INDEXES:
+            index.invalidate()
+        if application.response_cache.backend is not None:
+            application.response_cache.backend.clear()
+        yield application.application
+        application.db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_headers(app):
+    token = create_access_token(identity="admin@example.com", additional_claims={"is_admin": True})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def employer_data(name, **fields):
+    data = {
+        "employer_name": name,
+        "employer_addr_line_1": "1 Main St",
+        "employer_addr_city": "Austin",
+        "employer_addr_state": "TX",
+        "employer_addr_zip_code": "78701",
+        "employer_founded_date": "2000-01-01",
+        "employer_industry_sector_code": 11,
+        "employer_status": "Active",
+        "employer_legal_status": "LLC",
+    }
+    data.update(fields)
+    return data
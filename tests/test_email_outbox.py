@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+import application
+
+
+class FakeResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self._body = body
+
+    def json(self):
+        return self._body
+
+
+class FakeEmailApi:
+    """Stands in for the requests module, answering every post with the next of the given responses."""
+
+    def __init__(self, *responses, on_post=None):
+        self.responses = list(responses)
+        self.on_post = on_post
+        self.posts = []
+
+    def post(self, url, data=None, timeout=None):
+        # Nothing may be locked or left open in the dispatcher's transaction while the email API is called
+        assert not application.db.session().in_transaction()
+        self.posts.append(data)
+        if self.on_post:
+            self.on_post()
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def outbox(app, monkeypatch):
+    monkeypatch.setenv("GMAIL_API_URL", "http://email-api.test/send")
+    monkeypatch.setitem(app.config, "EMAIL_MAX_ATTEMPTS", 3)
+    monkeypatch.setitem(app.config, "EMAIL_RETRY_BASE_SECONDS", 30)
+    application.queue_email("user_verification:ada@example.com", {"to": "ada@example.com"})
+    application.db.session.commit()
+
+
+def outbox_email():
+    with application.db.engine.connect() as connection:
+        return connection.execute(select(application.EmailOutbox.__table__)).one()
+
+
+def make_due():
+    application.db.session.execute(
+        update(application.EmailOutbox).values(email_next_attempt_datetime=datetime.utcnow() - timedelta(seconds=1)))
+    application.db.session.commit()
+
+
+def test_sent_email_is_marked_as_sent(outbox):
+    statuses = []
+    api = FakeEmailApi(FakeResponse(200, {}), on_post=lambda: statuses.append(outbox_email().email_status))
+
+    assert application.dispatch_pending_emails(api) == 1
+
+    assert api.posts == [{"to": "ada@example.com"}]
+    assert statuses == ["sending"]
+    assert outbox_email().email_status == "sent"
+    assert application.dispatch_pending_emails(api) == 0
+
+
+def test_failed_sends_back_off_until_the_email_fails(outbox):
+    api = FakeEmailApi(FakeResponse(500, {}), FakeResponse(200, {"error": "Quota exceeded"}), FakeResponse(503, {}))
+
+    for attempt, delay in ((1, 30), (2, 60)):
+        started = datetime.utcnow()
+        application.dispatch_pending_emails(api)
+        email = outbox_email()
+        assert (email.email_status, email.email_attempts) == ("pending", attempt)
+        assert started + timedelta(seconds=delay) <= email.email_next_attempt_datetime
+        assert email.email_next_attempt_datetime <= datetime.utcnow() + timedelta(seconds=delay)
+        # Not due yet
+        assert application.dispatch_pending_emails(api) == 0
+        make_due()
+
+    application.dispatch_pending_emails(api)
+
+    email = outbox_email()
+    assert (email.email_status, email.email_attempts) == ("failed", 3)
+    assert email.email_last_error == "Failed to send email"
+    assert len(api.posts) == 3
+
+
+def test_email_queued_again_while_sending_is_sent_again(outbox):
+    def queue_again():
+        application.queue_email("user_verification:ada@example.com", {"to": "ada@example.com", "link": "new"})
+        application.db.session.commit()
+
+    api = FakeEmailApi(FakeResponse(200, {}), FakeResponse(200, {}), on_post=queue_again)
+    application.dispatch_pending_emails(api)
+
+    assert outbox_email().email_status == "pending"
+    api.on_post = None
+    application.dispatch_pending_emails(api)
+    assert api.posts[-1] == {"to": "ada@example.com", "link": "new"}
+    assert outbox_email().email_status == "sent"
+
+
+def test_email_is_claimed_again_after_its_lease_runs_out(outbox):
+    application.db.session.execute(update(application.EmailOutbox).values(email_status="sending"))
+    application.db.session.commit()
+    api = FakeEmailApi(FakeResponse(200, {}))
+
+    # Still leased to the dispatcher that claimed it
+    application.db.session.execute(update(application.EmailOutbox).values(
+        email_next_attempt_datetime=datetime.utcnow() + timedelta(seconds=60)))
+    application.db.session.commit()
+    assert application.dispatch_pending_emails(api) == 0
+
+    make_due()
+    assert application.dispatch_pending_emails(api) == 1
+    assert outbox_email().email_status == "sent"
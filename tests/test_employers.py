@@ -0,0 +1,14 @@
+from tests.conftest import employer_data
+
+
+def test_create_employer_without_address_line_2(client, admin_headers):
+    response = client.post("/employer", json=employer_data("Acme", employer_addr_line_2=None), headers=admin_headers)
+
+    assert response.status_code == 201
+
+
+def test_create_employer_rejects_long_address_line_2(client, admin_headers):
+    response = client.post("/employer", json=employer_data("Acme", employer_addr_line_2="x" * 256),
+                           headers=admin_headers)
+
+    assert response.status_code == 400
@@ -0,0 +1,9 @@
+import pytest
+
+import application
+
+
+@pytest.mark.parametrize("description, statement", application.hot_queries(),
+                         ids=[description for description, statement in application.hot_queries()])
+def test_hot_query_uses_an_index(app, description, statement):
+    assert application.find_table_scans(statement) == []
@@ -0,0 +1,121 @@
+import json
+
+from sqlalchemy import event
+
+import application
+from tests.conftest import employer_data
+
+
+def import_ndjson(client, headers, table_name, rows):
+    body = "\n".join(json.dumps(row) for row in rows)
+    return client.post(f"/admin/import/{table_name}", data=body, headers=headers,
+                       content_type="application/x-ndjson")
+
+
+def test_exported_employers_import_again(client, admin_headers):
+    for name in ("Acme", "Globex"):
+        client.post("/employer", json=employer_data(name, employer_addr_line_2=None), headers=admin_headers)
+    exported = client.get("/admin/export/employers", headers=admin_headers).get_data(as_text=True)
+
+    response = client.post("/admin/import/employers", data=exported, headers=admin_headers,
+                           content_type="application/x-ndjson")
+
+    assert response.status_code == 200
+    assert response.json["data"]["imported"] == 2
+    assert response.json["data"]["errors"] == []
+
+
+def test_row_failing_validation_is_reported_without_stopping_the_import(client, admin_headers):
+    response = import_ndjson(client, admin_headers, "employers",
+                             [employer_data(12345), employer_data("Acme", employer_addr_line_2=None)])
+
+    assert response.status_code == 200
+    assert response.json["data"]["imported"] == 1
+    assert [error["row"] for error in response.json["data"]["errors"]] == [1]
+
+
+def test_relation_batch_stages_only_its_own_rows(app, client, admin_headers, monkeypatch):
+    for name in ("A", "B", "C"):
+        client.post("/employer", json=employer_data(name), headers=admin_headers)
+    staged_ids = []
+    stage_employer_relations = application.stage_employer_relations
+
+    def record_staged(relations):
+        staged_ids.extend(relation.employer_relation_id for relation in relations)
+        return stage_employer_relations(relations)
+
+    def insert_concurrent_relation(connection, cursor, statement, parameters, context, executemany):
+        # Stands in for another request committing a relation right after the batch is inserted
+        if executemany and statement.startswith("INSERT INTO employer_relations"):
+            cursor.execute("INSERT INTO employer_relations (parent_employer_id, child_employer_id, "
+                           "employer_relation_type, employer_relation_start_date) "
+                           "VALUES (1, 3, 'Merger', '2010-01-01')")
+
+    monkeypatch.setattr(application, "stage_employer_relations", record_staged)
+    monkeypatch.setattr(application.db.engine.dialect, "insert_executemany_returning", False)
+    event.listen(application.db.engine, "after_cursor_execute", insert_concurrent_relation)
+    try:
+        response = import_ndjson(client, admin_headers, "employer_relations", [
+            {"parent_employer_id": 1, "child_employer_id": 2, "employer_relation_type": "Spin-off",
+             "employer_relation_start_date": "2005-01-01"},
+            {"parent_employer_id": 2, "child_employer_id": 3, "employer_relation_type": "Spin-off",
+             "employer_relation_start_date": "2006-01-01"},
+        ])
+    finally:
+        event.remove(application.db.engine, "after_cursor_execute", insert_concurrent_relation)
+
+    assert response.json["data"]["imported"] == 2
+    assert staged_ids == [1, 2]
+
+
+def relation_row(parent_id, child_id, relation_type="Spin-off"):
+    return {"parent_employer_id": parent_id, "child_employer_id": child_id, "employer_relation_type": relation_type,
+            "employer_relation_start_date": "2005-01-01"}
+
+
+def count_statements(callback):
+    statements = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(application.db.engine, "before_cursor_execute", record)
+    try:
+        callback()
+    finally:
+        event.remove(application.db.engine, "before_cursor_execute", record)
+    return len(statements)
+
+
+def test_relation_batch_takes_the_same_statements_whatever_its_size(client, admin_headers):
+    import_ndjson(client, admin_headers, "employers", [employer_data(f"Employer {n}") for n in range(1, 71)])
+
+    def import_chain(first_id, length):
+        response = import_ndjson(client, admin_headers, "employer_relations",
+                                 [relation_row(n, n + 1) for n in range(first_id, first_id + length)])
+        assert response.json["data"]["imported"] == length
+
+    small_batch = count_statements(lambda: import_chain(1, 3))
+    large_batch = count_statements(lambda: import_chain(10, 40))
+
+    assert large_batch == small_batch
+
+
+def test_relation_batch_records_the_same_lineage_as_a_rebuild(app, client, admin_headers):
+    import_ndjson(client, admin_headers, "employers", [employer_data(f"Employer {n}") for n in range(1, 13)])
+    # Relations already recorded before the batch, which the batch extends on both sides and duplicates
+    import_ndjson(client, admin_headers, "employer_relations", [relation_row(2, 3), relation_row(6, 7, "Merger")])
+
+    import_ndjson(client, admin_headers, "employer_relations", [
+        relation_row(3, 4), relation_row(1, 2, "Rebranding"), relation_row(5, 6), relation_row(4, 5, "Merger"),
+        relation_row(2, 3), relation_row(8, 9), relation_row(7, 8), relation_row(1, 10), relation_row(10, 4),
+    ])
+
+    recorded = {tuple(row) for row in application.db.session.execute(application.select(
+        application.EmployerLineage.ancestor_employer_id, application.EmployerLineage.descendant_employer_id,
+        application.EmployerLineage.lineage_depth, application.EmployerLineage.lineage_relation_mask))}
+    relations = application.db.session.execute(application.select(
+        application.EmployerRelation.parent_employer_id, application.EmployerRelation.child_employer_id,
+        application.EmployerRelation.employer_relation_type).order_by(application.EmployerRelation.employer_relation_id))
+    rebuilt = {tuple(row.values()) for row in application.compute_employer_lineage(relations)}
+    assert recorded == rebuilt
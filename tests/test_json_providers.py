@@ -0,0 +1,20 @@
+import json
+
+import pytest
+from flask.json.provider import DefaultJSONProvider
+
+import application
+
+orjson = pytest.importorskip("orjson")
+
+
+def test_orjson_bodies_are_equivalent_to_the_default_provider(app):
+    payload = {"data": [{"id": 1, "name": "Café Zoë", "foundedDate": application.date(2000, 1, 1),
+                         "updated": application.datetime(2020, 5, 17, 12, 30)}]}
+
+    default_body = DefaultJSONProvider(app).response(payload).get_data()
+    orjson_body = application.OrjsonProvider(app).response(payload).get_data()
+
+    assert json.loads(orjson_body) == json.loads(default_body)
+    assert "Café Zoë".encode() in orjson_body
+    assert b"Caf\\u00e9 Zo\\u00eb" in default_body
@@ -0,0 +1,36 @@
+from datetime import date
+
+from sqlalchemy import insert
+
+import application
+from tests.conftest import employer_data
+
+
+def test_lineage_migration_backfills_existing_relations(client, admin_headers):
+    for name in ("A", "B", "C"):
+        client.post("/employer", json=employer_data(name), headers=admin_headers)
+    # A database from before migration 1: relations but no employer_lineage table
+    with application.db.engine.begin() as connection:
+        application.EmployerLineage.__table__.drop(connection)
+        connection.execute(insert(application.EmployerRelation), [
+            {"parent_employer_id": 1, "child_employer_id": 2, "employer_relation_type": "Spin-off",
+             "employer_relation_start_date": date(2005, 1, 1)},
+            {"parent_employer_id": 2, "child_employer_id": 3, "employer_relation_type": "Merger",
+             "employer_relation_start_date": date(2006, 1, 1)},
+        ])
+
+    with application.db.engine.begin() as connection:
+        application.migrate_lineage_outbox_and_versions(connection)
+
+    response = client.get("/employer/descendants?employer_id=1", headers=admin_headers)
+    assert response.status_code == 200
+    assert [(employer["id"], employer["depth"]) for employer in response.json["data"]] == [(2, 1), (3, 2)]
+
+
+def test_invalid_max_depth_is_rejected(client, admin_headers):
+    client.post("/employer", json=employer_data("A"), headers=admin_headers)
+
+    response = client.get("/employer/ancestors?employer_id=1&max_depth=deep", headers=admin_headers)
+
+    assert response.status_code == 400
+    assert response.json["error"] == "Invalid max depth"
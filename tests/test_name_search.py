@@ -0,0 +1,26 @@
+import application
+from tests.conftest import employer_data
+
+
+def search(client, headers, query, **args):
+    response = client.get("/employers/search", query_string={"q": query, **args}, headers=headers)
+    assert response.status_code == 200
+    return [(match["name"], match["match"]) for match in response.json["data"]]
+
+
+def test_exact_prefix_and_fuzzy_matches_rank_in_that_order(client, admin_headers):
+    for name in ("Acme Corporation", "Acme", "Acne Studios", "Globex"):
+        client.post("/employer", json=employer_data(name), headers=admin_headers)
+
+    assert search(client, admin_headers, "acme") == [("Acme", "exact"), ("Acme Corporation", "prefix")]
+    assert search(client, admin_headers, "globx") == [("Globex", "fuzzy")]
+
+
+def test_fuzzy_candidates_are_capped(client, admin_headers, monkeypatch):
+    for name in ("Glob", "Globe", "Globex"):
+        client.post("/employer", json=employer_data(name), headers=admin_headers)
+    assert search(client, admin_headers, "globx") == [("Glob", "fuzzy"), ("Globe", "fuzzy"), ("Globex", "fuzzy")]
+
+    monkeypatch.setattr(application, "NAME_SEARCH_MAX_CANDIDATES", 1)
+
+    assert len(search(client, admin_headers, "globx")) == 1
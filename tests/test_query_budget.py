@@ -0,0 +1,47 @@
+import logging
+
+import pytest
+
+import application
+
+
+@pytest.fixture
+def n_plus_one_naics_codes(monkeypatch):
+    """Make GET /naics-codes (budget 2) look the sectors version up once per sector, as an N+1 regression would."""
+    ensure_current = application.naics_sector_map.ensure_current
+
+    def ensure_current_per_sector():
+        for sector in range(3):
+            application.get_data_version(application.NAICS_CODES_VERSION)
+        return ensure_current()
+
+    monkeypatch.setattr(application.naics_sector_map, "ensure_current", ensure_current_per_sector)
+
+
+def test_route_within_its_budget_passes(client, admin_headers):
+    assert client.get("/naics-codes", headers=admin_headers).status_code == 200
+
+
+def test_route_over_its_budget_fails_in_raise_mode(app, client, admin_headers, n_plus_one_naics_codes, caplog):
+    assert app.config['QUERY_BUDGET_MODE'] == 'raise'
+
+    response = client.get("/naics-codes", headers=admin_headers)
+
+    assert response.status_code == 500
+    [record] = [record for record in caplog.records if record.exc_info]
+    error = record.exc_info[1]
+    assert isinstance(error, application.QueryBudgetExceeded)
+    assert "GET /naics-codes ran 5 SQL statements, over its budget of 2" in str(error)
+    assert "4 x SELECT ... FROM data_versions WHERE" in str(error)
+
+
+def test_route_over_its_budget_is_only_logged_in_log_mode(app, client, admin_headers, n_plus_one_naics_codes,
+                                                          monkeypatch, caplog):
+    monkeypatch.setitem(app.config, "QUERY_BUDGET_MODE", "log")
+
+    with caplog.at_level(logging.WARNING):
+        response = client.get("/naics-codes", headers=admin_headers)
+
+    assert response.status_code == 200
+    [record] = [record for record in caplog.records if record.levelno == logging.WARNING]
+    assert record.getMessage().startswith("GET /naics-codes ran 5 SQL statements, over its budget of 2")
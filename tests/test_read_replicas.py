@@ -0,0 +1,163 @@
+import time
+
+import pytest
+from sqlalchemy import create_engine, event, insert, select, text, update
+from sqlalchemy.pool import StaticPool
+
+import application
+from tests.conftest import employer_data
+
+
+@pytest.fixture
+def replica(app, monkeypatch):
+    """A second in-memory SQLite database standing in for a read replica of the test database."""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    application.db.metadata.create_all(engine)
+    monkeypatch.setitem(application.db.engines, "replica_0", engine)
+    monkeypatch.setitem(app.config, "READ_REPLICA_BINDS", ["replica_0"])
+    # Recently checked, so the router does not ping it before the statements a test looks at
+    monkeypatch.setattr(application.replica_router, "_checks", {"replica_0": (time.monotonic(), True)})
+    yield engine
+    application.db.session.remove()
+    engine.dispose()
+
+
+@pytest.fixture
+def served_by(replica):
+    """List of ("primary" or "replica", SQL statement) for every statement run while the test is recording."""
+    statements = []
+    listeners = []
+    for name, engine in (("primary", application.db.engine), ("replica", replica)):
+        def record(connection, cursor, statement, parameters, context, executemany, name=name):
+            statements.append((name, statement))
+
+        event.listen(engine, "before_cursor_execute", record)
+        listeners.append((engine, record))
+    yield statements
+    for engine, record in listeners:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def replicate(replica):
+    """Copy every table of the primary to the replica, as replication would once it caught up."""
+    with application.db.engine.connect() as primary_connection, replica.begin() as replica_connection:
+        for table in application.db.metadata.sorted_tables:
+            replica_connection.execute(table.delete())
+            rows = [row._asdict() for row in primary_connection.execute(select(table))]
+            if rows:
+                replica_connection.execute(insert(table), rows)
+
+
+def test_read_only_route_is_served_by_the_replica(client, admin_headers, replica, served_by):
+    client.post("/employer", json=employer_data("Acme"), headers=admin_headers)
+    replicate(replica)
+    served_by.clear()
+
+    response = client.get("/employers", headers=admin_headers)
+
+    assert response.status_code == 200
+    assert served_by
+    assert {name for name, statement in served_by} == {"replica"}
+
+
+def test_write_route_is_served_by_the_primary(client, admin_headers, served_by):
+    response = client.post("/employer", json=employer_data("Acme"), headers=admin_headers)
+
+    assert response.status_code == 201
+    assert served_by
+    assert {name for name, statement in served_by} == {"primary"}
+
+
+def test_reads_after_a_write_in_the_same_request_stay_on_the_primary(app, client, admin_headers, replica, served_by):
+    client.post("/employer", json=employer_data("Acme"), headers=admin_headers)
+    replicate(replica)
+    served_by.clear()
+
+    with app.test_request_context():
+        session = application.db.session()
+        session.info["read_replica"] = True
+        session.execute(select(application.Employer.employer_name)).all()
+        session.execute(update(application.Employer).values(employer_name="Renamed"))
+        session.execute(select(application.Employer.employer_name)).all()
+        session.rollback()
+        session.info.pop("read_replica")
+
+    assert [(name, statement.split()[0]) for name, statement in served_by] == [
+        ("replica", "SELECT"), ("primary", "UPDATE"), ("primary", "SELECT")]
+
+
+def test_reads_fall_back_to_the_primary_when_the_replica_is_down(client, admin_headers, monkeypatch, served_by):
+    client.post("/employer", json=employer_data("Acme"), headers=admin_headers)
+    monkeypatch.setitem(application.db.engines, "replica_0", create_engine("sqlite:////nonexistent/replica.db"))
+    monkeypatch.setattr(application.replica_router, "_checks", {})
+    served_by.clear()
+
+    response = client.get("/employers", headers=admin_headers)
+
+    assert response.status_code == 200
+    assert [employer["name"] for employer in response.json["data"]["employers"]] == ["Acme"]
+    assert {name for name, statement in served_by} == {"primary"}
+    assert application.replica_router.status() == {"replica_0": False}
+
+
+def test_lagging_replica_does_not_reload_the_name_index(client, admin_headers, replica, monkeypatch):
+    client.post("/employer", json=employer_data("Acme"), headers=admin_headers)
+    replicate(replica)
+    client.get("/employers/search?q=acme", headers=admin_headers)
+    loads = []
+    load = application.employer_name_index._load
+    monkeypatch.setattr(application.employer_name_index, "_load", lambda: loads.append(1) or load())
+
+    # The replica has not caught up with this write, so it still reports the previous employers version
+    client.post("/employer", json=employer_data("Acme Two"), headers=admin_headers)
+    response = client.get("/employers/search?q=acme", headers=admin_headers)
+
+    assert [match["name"] for match in response.json["data"]] == ["Acme", "Acme Two"]
+    assert loads == []
+
+
+def test_raw_sql_write_in_a_replica_route_goes_to_the_primary(app, client, admin_headers, replica, served_by):
+    client.post("/employer", json=employer_data("Acme"), headers=admin_headers)
+    replicate(replica)
+    served_by.clear()
+
+    @application.use_read_replica()
+    def rename():
+        application.db.session.execute(text("UPDATE employers SET employer_name = 'Renamed'"))
+        return application.db.session.execute(select(application.Employer.employer_name)).scalar()
+
+    with app.test_request_context():
+        assert rename() == "Renamed"
+        application.db.session.rollback()
+
+    assert [(name, statement.split()[0]) for name, statement in served_by] == [("primary", "UPDATE"),
+                                                                               ("primary", "SELECT")]
+
+
+def test_raw_sql_reads_stay_on_the_replica_when_the_route_opts_in(app, client, admin_headers, replica, served_by):
+    client.post("/employer", json=employer_data("Acme"), headers=admin_headers)
+    replicate(replica)
+    served_by.clear()
+
+    @application.use_read_replica(text_reads=True)
+    def count_employers():
+        return application.db.session.execute(text("SELECT COUNT(*) FROM employers")).scalar()
+
+    with app.test_request_context():
+        assert count_employers() == 1
+
+    assert [(name, statement.split()[0]) for name, statement in served_by] == [("replica", "SELECT")]
+
+
+def test_autoflush_in_a_replica_route_moves_the_request_to_the_primary(app, replica, served_by):
+    @application.use_read_replica()
+    def add_and_count():
+        application.db.session.add(application.Employer(employer_name="Acme"))
+        return application.db.session.execute(select(application.Employer.employer_name)).scalars().all()
+
+    with app.test_request_context():
+        assert add_and_count() == ["Acme"]
+        application.db.session.rollback()
+
+    assert [(name, statement.split()[0]) for name, statement in served_by] == [("primary", "INSERT"),
+                                                                               ("primary", "SELECT")]
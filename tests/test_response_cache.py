@@ -0,0 +1,153 @@
+import pytest
+from sqlalchemy import update
+
+import application
+from tests.conftest import employer_data
+
+
+def rename_from_another_worker(employer_id, name):
+    # Writes like another worker would: the row and its data version change, but this worker's cache is not told
+    application.db.session.execute(update(application.Employer).where(application.Employer.employer_id == employer_id)
+                                   .values(employer_name=name))
+    application.bump_data_version(application.EMPLOYERS_VERSION)
+    application.db.session.commit()
+
+
+def test_cached_graph_keeps_the_etag_it_was_built_under(client, admin_headers):
+    client.post("/employer", json=employer_data("Acme"), headers=admin_headers)
+    first = client.get("/employers-graph?employer_id=1", headers=admin_headers)
+    rename_from_another_worker(1, "Acme Renamed")
+
+    cached = client.get("/employers-graph?employer_id=1", headers=admin_headers)
+    revalidated = client.get("/employers-graph?employer_id=1",
+                             headers={**admin_headers, "If-None-Match": cached.headers["ETag"]})
+
+    assert cached.get_data() == first.get_data()
+    assert cached.headers["ETag"] == first.headers["ETag"]
+    assert revalidated.status_code == 200
+
+
+def test_graph_etag_matches_the_rebuilt_body(client, admin_headers):
+    client.post("/employer", json=employer_data("Acme"), headers=admin_headers)
+    client.get("/employers-graph?employer_id=1", headers=admin_headers)
+    rename_from_another_worker(1, "Acme Renamed")
+    application.response_cache.backend.clear()
+
+    rebuilt = client.get("/employers-graph?employer_id=1", headers=admin_headers)
+    revalidated = client.get("/employers-graph?employer_id=1",
+                             headers={**admin_headers, "If-None-Match": rebuilt.headers["ETag"]})
+
+    assert "Acme Renamed" in rebuilt.get_data(as_text=True)
+    assert revalidated.status_code == 304
+
+
+class DictCacheBackend:
+    """Stand-in for a shared CacheBackend, configured the way one would be: RESPONSE_CACHE_BACKEND="module:Class"."""
+
+    def __init__(self, app):
+        self.entries = {}
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        return entry[0] if entry else None
+
+    def set(self, key, value, ttl, tags):
+        self.entries[key] = (value, tags)
+
+    def invalidate_tags(self, tags):
+        self.entries = {key: entry for key, entry in self.entries.items() if not set(entry[1]) & set(tags)}
+
+    def clear(self):
+        self.entries.clear()
+
+
+@pytest.fixture
+def fresh_counters(monkeypatch):
+    monkeypatch.setattr(application.response_cache, "hits", 0)
+    monkeypatch.setattr(application.response_cache, "misses", 0)
+
+
+def test_configured_backend_serves_the_cached_responses(app, client, admin_headers, monkeypatch, fresh_counters):
+    monkeypatch.setitem(app.config, "RESPONSE_CACHE_BACKEND", "tests.test_response_cache:DictCacheBackend")
+    monkeypatch.setattr(application.response_cache, "_backend", None)
+    client.post("/employer", json=employer_data("Acme"), headers=admin_headers)
+
+    first = client.get("/employers-graph?employer_id=1", headers=admin_headers)
+    backend = application.response_cache.backend
+    [(value, tags)] = backend.entries.values()
+    cached = client.get("/employers-graph?employer_id=1", headers=admin_headers)
+
+    assert isinstance(backend, DictCacheBackend)
+    assert value.endswith(first.get_data())
+    assert "employer:1" in tags
+    assert cached.get_data() == first.get_data()
+    assert application.response_cache.stats() == {"hits": 1, "misses": 1}
+
+
+def test_hits_and_misses_are_counted(client, admin_headers, fresh_counters):
+    client.post("/employer", json=employer_data("Acme"), headers=admin_headers)
+
+    for employer_id in (1, 1, 1, 2):
+        client.get(f"/employers-graph?employer_id={employer_id}", headers=admin_headers)
+
+    stats = application.response_cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 2)
+
+
+def test_employer_write_evicts_the_cached_graphs_of_the_employer(client, admin_headers):
+    client.post("/employer", json=employer_data("Acme"), headers=admin_headers)
+    client.post("/employer", json=employer_data("Globex"), headers=admin_headers)
+    client.get("/employers-graph?employer_id=1", headers=admin_headers)
+    client.get("/employers-graph?employer_id=2", headers=admin_headers)
+    assert application.response_cache.stats()["entries"] == 2
+
+    response = client.patch("/employer", json=employer_data("Acme Renamed", employer_id=1), headers=admin_headers)
+    assert response.status_code == 200
+
+    # Only the graph of the renamed employer is evicted; the graphs are not keyed on the employers version
+    assert application.response_cache.stats()["entries"] == 1
+    assert "Acme Renamed" in client.get("/employers-graph?employer_id=1", headers=admin_headers).get_data(as_text=True)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(application.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_their_ttl(clock):
+    backend = application.LRUCacheBackend(max_entries=10, max_bytes=1024)
+    backend.set("a", b"cached", 60, ["employers"])
+
+    clock[0] += 60
+    assert backend.get("a") == b"cached"
+    clock[0] += 1
+    assert backend.get("a") is None
+    assert backend.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(clock):
+    backend = application.LRUCacheBackend(max_entries=2, max_bytes=10)
+    backend.set("a", b"aaa", 60, [])
+    backend.set("b", b"bbb", 60, [])
+    backend.get("a")
+
+    backend.set("c", b"ccc", 60, [])
+    assert (backend.get("a"), backend.get("b"), backend.get("c")) == (b"aaa", None, b"ccc")
+
+    # Over max_bytes: the least recently used entry goes even though there is room for another entry
+    backend.set("d", b"dddddddd", 60, [])
+    assert (backend.get("a"), backend.get("c"), backend.get("d")) == (None, None, b"dddddddd")
+    assert backend.stats() == {"entries": 1, "bytes": 8, "evictions": 3}
+
+
+def test_invalidate_tags_removes_only_the_tagged_entries(clock):
+    backend = application.LRUCacheBackend(max_entries=10, max_bytes=1024)
+    backend.set("list", b"list", 60, ["employers"])
+    backend.set("graph-1", b"graph 1", 60, ["employer:1", "employer:2"])
+    backend.set("graph-3", b"graph 3", 60, ["employer:3"])
+
+    backend.invalidate_tags(["employer:2"])
+
+    assert (backend.get("list"), backend.get("graph-1"), backend.get("graph-3")) == (b"list", None, b"graph 3")